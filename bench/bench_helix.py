@@ -0,0 +1,125 @@
+"""Helix istemcisinin event loop'u ne kadar bloke ettiğini ölçer.
+
+Kullanım: python bench/bench_helix.py [--streamers 500] [--rounds 10] [--latency 0.1]
+
+"before" eski senkron `requests` akışını, "after" main.get_online_streamers'ı çalıştırır.
+Sahte Helix sunucusu ayrı bir thread'de koşar, böylece senkron istemci onu kilitleyemez.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_helix import create_app, start_fake_helix
+
+
+def run_server_in_thread(latency: float):
+    ready = threading.Event()
+    result = {}
+
+    def runner():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _, token_url, streams_url = loop.run_until_complete(start_fake_helix(create_app(latency=latency)))
+        result["urls"] = (token_url, streams_url)
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=runner, daemon=True).start()
+    ready.wait()
+    return result["urls"]
+
+
+class LoopLagProbe:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_stall = 0.0
+        self.total_blocked = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - t0 - self.interval
+            if lag > 0.001:
+                self.total_blocked += lag
+                self.max_stall = max(self.max_stall, lag)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def legacy_get_online_streamers(usernames, token, client_id, streams_url):
+    import requests
+    headers = {"Authorization": f"Bearer {token}", "Client-Id": client_id}
+    online = {}
+    for i in range(0, len(usernames), 100):
+        params = [("user_login", u) for u in usernames[i:i + 100]]
+        resp = requests.get(streams_url, headers=headers, params=params, timeout=10)
+        resp.raise_for_status()
+        for item in resp.json().get("data", []):
+            online[item["user_login"].lower()] = item
+    return online
+
+
+async def measure(label, rounds, call):
+    probe = LoopLagProbe()
+    probe.start()
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    online = {}
+    for _ in range(rounds):
+        online = await call()
+        await asyncio.sleep(0)
+    wall = time.perf_counter() - t0
+    await probe.stop()
+    print(f"{label:<7} wall={wall:7.3f}s  loop_blocked={probe.total_blocked:7.3f}s  "
+          f"max_stall={probe.max_stall * 1000:8.1f}ms  online={len(online)}")
+
+
+async def run(args):
+    import main
+
+    streamers = [f"bench_user_{i}" for i in range(args.streamers)]
+    token = await main.get_app_token()
+
+    async def before():
+        return legacy_get_online_streamers(streamers, token, main.CLIENT_ID, main.TWITCH_STREAMS_URL)
+
+    async def after():
+        return await main.get_online_streamers(streamers)
+
+    print(f"{args.streamers} streamer, {args.rounds} tur, sunucu gecikmesi {args.latency * 1000:.0f}ms")
+    await measure("before", args.rounds, before)
+    await measure("after", args.rounds, after)
+    await main.close_http_session()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streamers", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    token_url, streams_url = run_server_in_thread(args.latency)
+    os.environ.setdefault("TWITCH_CLIENT_ID", "bench")
+    os.environ.setdefault("TWITCH_CLIENT_SECRET", "bench")
+    os.environ["TWITCH_TOKEN_URL"] = token_url
+    os.environ["TWITCH_STREAMS_URL"] = streams_url
+    asyncio.run(run(args))
@@ -0,0 +1,220 @@
+"""Uçtan uca yük testi: sahte Helix + sahte kanal sayfalarıyla monitor'ü 10/100/500 kanalda koşturur.
+
+Kullanım: python bench/bench_load.py [--channels 10,100,500] [--duration 60] [--online-ratio 0.3]
+          [--churn 30] [--latency 0.05] [--jitter 0.02] [--error-rate 0.02] [--timeline senaryo.json]
+          [--max-pages 0] [--api-only]
+
+Sahte sunucu bu süreçte, ölçülen monitor her kanal sayısı için ayrı bir alt süreçte koşar;
+TWITCH_TOKEN_URL / TWITCH_STREAMS_URL / TWITCH_CHANNEL_URL ortam değişkenleriyle sunucuya yönlendirilir.
+Raporlanan: açılan sayfa/sn (launcher meşgulken), tepe noktada sayfa başına RSS, event loop gecikmesi
+(ortalama / p99 kova sınırı / maksimum), sunucuya gelen API çağrıları ve enjekte edilen hatalar.
+--api-only tarayıcı açmaz; sayfa açma/kapama sahte tutulur, sadece sorgu ve slot yolu ölçülür.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_helix import create_app, load_timeline, make_timeline, start_fake_helix
+
+
+def total_rss_mb(main) -> float:
+    total = main.script_process.memory_info().rss
+    for child in main.script_process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except Exception:
+            pass
+    return total / 1024 / 1024
+
+
+class BusyClock:
+    # Launcher'ın iş yaptığı süre; sayfa/sn bu süreye bölünür, boşta geçen süre ortalamayı düşürmesin
+    def __init__(self, main, interval: float = 0.05):
+        self.main = main
+        self.interval = interval
+        self.seconds = 0.0
+        self._task = None
+
+    async def _run(self):
+        launcher = self.main.stream_launcher
+        while True:
+            await asyncio.sleep(self.interval)
+            if launcher.in_flight or launcher.depth():
+                self.seconds += self.interval
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+def histogram_summary(histogram) -> dict:
+    counts, total, n = histogram.values.get((), [[0] * (len(histogram.buckets) + 1), 0.0, 0])
+    if not n:
+        return {"mean_ms": 0.0, "p99_ms": 0.0}
+    # p99: örneklerin %99'unu kapsayan ilk kova sınırı
+    target = n * 0.99
+    cumulative = 0
+    p99 = float("inf")
+    for bound, count in zip(histogram.buckets, counts):
+        cumulative += count
+        if cumulative >= target:
+            p99 = bound
+            break
+    return {"mean_ms": round(total / n * 1000, 2), "p99_ms": p99 * 1000}
+
+
+async def run_child(args):
+    import main
+
+    main.headless_mode = True
+    main.poll_scheduler.discovery_interval = args.discovery
+    main.poll_scheduler.confirm_interval = args.confirm
+    main.loop_lag_monitor.start()
+
+    if args.api_only:
+        async def fake_open(user):
+            await asyncio.sleep(0.05)
+            main.pages[user] = None
+            main.watch_times[user] = time.time()
+            return True
+
+        async def fake_close(user, discard=False):
+            main.pages.pop(user, None)
+            if user in main.watch_times:
+                main.watch_ledger.record(user, main.watch_times.pop(user), time.time())
+
+        main.open_stream = fake_open
+        main.close_stream = fake_close
+    elif not await main.init_playwright():
+        print(json.dumps({"error": "Playwright başlatılamadı"}))
+        return
+    else:
+        await main.context_pool.warm()
+        main.context_pool.start()
+        main.page_watchdog.start()
+    await asyncio.sleep(1)
+    baseline = await asyncio.to_thread(total_rss_mb, main)
+
+    main.stream_launcher.start()
+    main.watch_ledger.start()
+    main.streamer_meta.update({f"load_{i}": {"priority": main.DEFAULT_PRIORITY} for i in range(args.child)})
+    main.streamer_view.replace(main.streamer_meta)
+    await main.token_manager.get()
+
+    busy = BusyClock(main)
+    busy.start()
+    started = time.time()
+    peak_pages = 0
+    peak_rss = baseline
+    while time.time() - started < args.duration:
+        await main.poll_once()
+        await asyncio.sleep(1)
+        if len(main.pages) >= peak_pages:
+            peak_pages = len(main.pages)
+            peak_rss = await asyncio.to_thread(total_rss_mb, main)
+
+    busy.stop()
+    busy_seconds = busy.seconds
+    launched = main.stream_launcher.stats["launched"]
+    result = {
+        "channels": args.child,
+        "launched": launched,
+        "failed": main.stream_launcher.stats["failed"],
+        "timeouts": main.stream_launcher.stats["timeouts"],
+        "peak_pages": peak_pages,
+        "pages_per_sec": round(launched / busy_seconds, 2) if busy_seconds else 0.0,
+        "rss_per_page_mb": round((peak_rss - baseline) / peak_pages, 1) if peak_pages else 0.0,
+        "baseline_mb": round(baseline, 1),
+        "loop_lag": {**histogram_summary(main.loop_lag_seconds), "max_ms": round(main.loop_lag_monitor.max * 1000, 1)},
+        "slots": {"capacity": main.slot_manager.capacity(), **main.slot_manager.stats},
+        "helix": {"requests": main.helix_stats["requests"], "errors": main.helix_stats["errors"]},
+        "launch": main.stream_launcher.percentiles(),
+    }
+    await main.cleanup()
+    print(json.dumps(result))
+
+
+async def run_parent(args):
+    channel_counts = [int(c) for c in args.channels.split(",") if c.strip()]
+    rows = []
+    for count in channel_counts:
+        logins = [f"load_{i}" for i in range(count)]
+        timeline = load_timeline(args.timeline) if args.timeline else make_timeline(
+            logins, args.duration + 60, args.online_ratio, args.churn, seed=count)
+        app = create_app(latency=args.latency, latency_jitter=args.jitter, error_rate=args.error_rate, timeline=timeline, seed=count)
+        runner, token_url, streams_url = await start_fake_helix(app)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                TWITCH_TOKEN_URL=token_url,
+                TWITCH_STREAMS_URL=streams_url,
+                TWITCH_CHANNEL_URL=app["channel_url"],
+                LEDGER_PATH=os.path.join(tmp, "ledger.db"),
+                STATE_PATH=os.path.join(tmp, "state.json"),
+                AUTO_START="true",
+                DAEMON="true",
+                MAX_PAGES=str(args.max_pages),
+            )
+            child_args = [
+                sys.executable, os.path.abspath(__file__), "--child", str(count),
+                "--duration", str(args.duration), "--discovery", str(args.discovery), "--confirm", str(args.confirm),
+            ]
+            if args.api_only:
+                child_args.append("--api-only")
+            # Log dosyası geçici dizine düşsün
+            proc = await asyncio.create_subprocess_exec(*child_args, env=env, cwd=tmp, stdout=asyncio.subprocess.PIPE)
+            out, _ = await proc.communicate()
+        await runner.cleanup()
+
+        lines = [l for l in out.decode().splitlines() if l.startswith("{")]
+        result = json.loads(lines[-1]) if lines else {"error": f"alt süreç çıktı vermedi (kod {proc.returncode})"}
+        result.setdefault("channels", count)
+        result["api_calls"] = dict(app["calls"])
+        rows.append(result)
+        print(json.dumps(result), flush=True)
+
+    print()
+    print(f"{'kanal':>6} {'tepe sayfa':>10} {'sayfa/sn':>9} {'RSS/sayfa':>10} {'lag ort':>8} {'lag p99≤':>8} {'lag max':>8} {'API':>6} {'5xx':>5} {'slot ret':>8}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r['channels']:>6} HATA: {r['error']}")
+            continue
+        lag = r["loop_lag"]
+        print(
+            f"{r['channels']:>6} {r['peak_pages']:>10} {r['pages_per_sec']:>9.2f} {r['rss_per_page_mb']:>8.1f}MB "
+            f"{lag['mean_ms']:>6.1f}ms {lag['p99_ms']:>6.0f}ms {lag['max_ms']:>6.0f}ms "
+            f"{r['api_calls']['streams'] + r['api_calls']['token']:>6} {r['api_calls']['errors']:>5} {r['slots']['rejected']:>8}"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", default="10,100,500")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--online-ratio", type=float, default=0.3)
+    parser.add_argument("--churn", type=float, default=30.0, help="ortalama canlı kalma süresi (sn)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--timeline", default="")
+    parser.add_argument("--discovery", type=float, default=10.0)
+    parser.add_argument("--confirm", type=float, default=5.0)
+    parser.add_argument("--max-pages", type=int, default=0, help="0 = boş RAM'e göre (main.py ile aynı)")
+    parser.add_argument("--api-only", action="store_true")
+    parser.add_argument("--child", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(run_child(args) if args.child else run_parent(args))
@@ -0,0 +1,82 @@
+"""Yayın başına RSS: context-per-stream ile paylaşımlı context düzenini karşılaştırır.
+
+Kullanım: python bench/bench_memory.py [--streams 20] [--shard-size 0] [--url https://www.twitch.tv/{login}]
+
+RSS, script_process ve tüm Chromium alt süreçlerinin toplamıdır. Varsayılan olarak yerel
+sahte kanal sayfaları açılır; gerçek sayılar için --url ile Twitch verilebilir.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_helix import create_app, start_fake_helix
+
+
+def total_rss_mb(main) -> float:
+    total = main.script_process.memory_info().rss
+    for child in main.script_process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except Exception:
+            pass
+    return total / 1024 / 1024
+
+
+async def measure_layout(main, shared: bool, args, url_template: str):
+    main.SHARED_CONTEXT = shared
+    main.CONTEXT_SHARD_SIZE = args.shard_size
+    if not await main.init_playwright():
+        raise SystemExit("Playwright başlatılamadı")
+    await asyncio.sleep(1)
+    baseline = total_rss_mb(main)
+
+    opened = []
+    for i in range(args.streams):
+        context, page = await main.create_watch_context()
+        await page.goto(url_template.format(login=f"bench_{i}"), wait_until="domcontentloaded")
+        opened.append((context, page))
+    await asyncio.sleep(args.settle)
+    loaded = total_rss_mb(main)
+
+    for context, page in opened:
+        await main.close_watch_page(context, page)
+    for context in main.shared_contexts:
+        await context.close()
+    main.shared_contexts.clear()
+    await main.browser.close()
+    await main.playwright.stop()
+
+    label = f"shared(shard={args.shard_size})" if shared else "per-stream"
+    per_stream = (loaded - baseline) / args.streams
+    print(f"{label:<18} baseline={baseline:8.1f}MB  loaded={loaded:8.1f}MB  per_stream={per_stream:7.1f}MB")
+
+
+async def run(args):
+    runner = None
+    url_template = args.url
+    if not url_template:
+        runner, token_url, _ = await start_fake_helix(create_app())
+        url_template = token_url.replace("/oauth2/token", "/channels/{login}")
+    import main
+
+    print(f"{args.streams} yayın, {args.settle}sn bekleme")
+    await measure_layout(main, False, args, url_template)
+    await measure_layout(main, True, args, url_template)
+    if runner:
+        await runner.cleanup()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--shard-size", type=int, default=0)
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--url", default="")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,134 @@
+"""Sayfa hazır olma süresi ve sabit durumdaki renderer CPU'su: eski akış ile olay tabanlı akış.
+
+Kullanım: python bench/bench_readiness.py [--tabs 20] [--window 20]
+
+"before" eski init script'i (2sn'lik setInterval) ve sleep(2) + wait_for_selector akışını,
+"after" main.prepare_watch_page'i kullanır. CPU, Chromium alt süreçlerinin pencere boyunca
+harcadığı user+system süresinin duvar saatine oranıdır (100% = bir çekirdek).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_helix import create_app, start_fake_helix
+
+LEGACY_INIT_SCRIPT = """
+    window.MediaSource = class { constructor() { throw new Error('Blocked'); } };
+    setInterval(() => {
+        document.querySelectorAll('video, audio').forEach(e => {
+            e.pause();
+            e.src = '';
+            e.load = () => {};
+            e.muted = true;
+            e.volume = 0;
+        });
+    }, 2000);
+"""
+
+
+async def legacy_prepare(user, page, url):
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+    except Exception:
+        try:
+            await page.goto(url, timeout=10000)
+        except Exception:
+            pass
+    await asyncio.sleep(2)
+    try:
+        await page.wait_for_selector('div[data-a-target="tw-core-button-label-text"]', timeout=5000)
+        for b in await page.query_selector_all('div[data-a-target="tw-core-button-label-text"]'):
+            if "izlemeye başla" in (await b.inner_text()).strip().lower():
+                await b.click()
+                break
+    except Exception:
+        pass
+
+
+def chromium_cpu_seconds(main) -> float:
+    total = 0.0
+    for child in main.script_process.children(recursive=True):
+        try:
+            if "chrom" in child.name().lower() or "headless" in child.name().lower():
+                times = child.cpu_times()
+                total += times.user + times.system
+        except Exception:
+            pass
+    return total
+
+
+async def run_variant(main, label, args, url_template):
+    if not await main.init_playwright():
+        raise SystemExit("Playwright başlatılamadı")
+
+    opened = []
+    for i in range(args.tabs):
+        if label == "before":
+            context = await main.browser.new_context(viewport={"width": 400, "height": 300})
+            await context.add_init_script(LEGACY_INIT_SCRIPT)
+            page = await context.new_page()
+        else:
+            context, page = await main.create_watch_context()
+        opened.append((context, page))
+
+    async def prepare(i, page):
+        user = f"bench_{i}"
+        url = url_template.format(login=user)
+        t0 = time.perf_counter()
+        if label == "before":
+            await legacy_prepare(user, page, url)
+        else:
+            main.page_owners[page] = user
+            await main.prepare_watch_page(user, page)
+        return time.perf_counter() - t0
+
+    durations = await asyncio.gather(*(prepare(i, page) for i, (_, page) in enumerate(opened)))
+    await asyncio.sleep(2)
+    started = 0
+    for _, page in opened:
+        try:
+            if await page.evaluate("document.body.dataset.started === '1'"):
+                started += 1
+        except Exception:
+            pass
+
+    cpu0, t0 = chromium_cpu_seconds(main), time.perf_counter()
+    await asyncio.sleep(args.window)
+    cpu = (chromium_cpu_seconds(main) - cpu0) / (time.perf_counter() - t0) * 100
+
+    for context, page in opened:
+        await main.close_watch_page(context, page)
+    main.shared_contexts.clear()
+    await main.browser.close()
+    await main.playwright.stop()
+
+    print(f"{label:<7} ready_mean={statistics.mean(durations):6.2f}s  ready_max={max(durations):6.2f}s  "
+          f"started={started}/{args.tabs}  renderer_cpu={cpu:6.1f}%")
+
+
+async def run(args):
+    runner, token_url, _ = await start_fake_helix(create_app())
+    url_template = token_url.replace("/oauth2/token", "/channels/{login}")
+    os.environ["TWITCH_CHANNEL_URL"] = url_template
+    import main
+
+    print(f"{args.tabs} sekme, {args.window}sn ölçüm penceresi")
+    await run_variant(main, "before", args, url_template)
+    await run_variant(main, "after", args, url_template)
+    await runner.cleanup()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=20)
+    parser.add_argument("--window", type=float, default=20.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,106 @@
+"""Kapanış süresi: sayfaları tek tek kapatan eski cleanup ile paralel, süre sınırlı cleanup.
+
+Kullanım: python bench/bench_shutdown.py [--pages 100] [--timeout 20] [--stall]
+
+Her varyant ayrı bir tarayıcıda --pages sekmeyi main.start_watching ile açar ve kapanışı ölçer.
+--stall kapanıştan hemen önce Chromium'un ana sürecini SIGSTOP ile dondurur; yeni cleanup'ın
+süre sınırında tarayıcıyı öldürdüğünü ve geride Chromium süreci kalmadığını gösterir
+(eski akış bu durumda sonsuza kadar bekleyeceği için sadece "after" çalıştırılır).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_helix import create_app, start_fake_helix
+
+
+async def legacy_cleanup(main):
+    for user in list(main.pages.keys()):
+        await main.stop_watching(user)
+    idle, main.context_pool.idle = main.context_pool.idle, []
+    for context, page, _ in idle:
+        await main.context_pool.discard(context, page)
+    for context in main.shared_contexts:
+        try:
+            await context.close()
+        except Exception:
+            pass
+    main.shared_contexts.clear()
+    await main.browser.close()
+    await main.playwright.stop()
+
+
+def stall_browser(main):
+    # Chromium'un ana süreci --type= almaz; durdurulunca browser.close cevap alamaz
+    for process in main.browser_processes():
+        try:
+            if "chrom" in process.name().lower() and not any(a.startswith("--type=") for a in process.cmdline()):
+                process.send_signal(signal.SIGSTOP)
+                return process.pid
+        except Exception:
+            pass
+    return None
+
+
+async def run_variant(main, label, args):
+    if not await main.init_playwright():
+        raise SystemExit("Playwright başlatılamadı")
+    users = [f"bench_{label}_{i}" for i in range(args.pages)]
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def open_one(user):
+        async with sem:
+            return await main.start_watching(user)
+
+    opened = sum(1 for ok in await asyncio.gather(*(open_one(u) for u in users)) if ok)
+    before = len(main.browser_processes())
+    stalled = stall_browser(main) if args.stall else None
+
+    t0 = time.perf_counter()
+    if label == "before":
+        await legacy_cleanup(main)
+    else:
+        await main.cleanup(args.timeout)
+    elapsed = time.perf_counter() - t0
+
+    await asyncio.sleep(0.5)
+    left = len(main.browser_processes())
+    extra = f"  durdurulan pid={stalled}" if stalled else ""
+    print(f"{label:<7} açık={opened}/{args.pages}  kapanış={elapsed:6.2f}s  "
+          f"tarayıcı süreçleri {before} -> {left}{extra}")
+
+
+async def run(args):
+    app = create_app()
+    runner, _, _ = await start_fake_helix(app)
+    os.environ["TWITCH_CHANNEL_URL"] = app["channel_url"]
+    # Defter ve snapshot geçici klasöre yazılır
+    workdir = tempfile.mkdtemp(prefix="watchbot-shutdown-")
+    os.environ["LEDGER_PATH"] = os.path.join(workdir, "ledger.db")
+    os.environ["STATE_PATH"] = os.path.join(workdir, "state.json")
+    import main
+
+    print(f"{args.pages} sayfa, süre sınırı {args.timeout}sn")
+    variants = ["after"] if args.stall else ["before", "after"]
+    for label in variants:
+        await run_variant(main, label, args)
+    await runner.cleanup()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stall", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,124 @@
+"""Kısma profillerinin renderer CPU'suna ve güç tüketimine etkisi: none / light / heavy.
+
+Kullanım: python bench/bench_throttle.py [--tabs 20] [--window 120] [--profiles none,light,heavy] [--beacon 10]
+
+Her profil için ayrı bir tarayıcıda --tabs sekme main.start_watching ile açılır, profil
+main.page_throttler üzerinden uygulanır. CPU, renderer süreçlerinin (ve tüm Chromium'un)
+pencere boyunca harcadığı user+system süresinin duvar saatine oranıdır (100% = bir çekirdek).
+Güç, okunabiliyorsa RAPL paket sayacından (/sys/class/powercap/intel-rapl:0) hesaplanır; bu sayaç
+tüm işlemciyi ölçtüğü için makine boşta değilken gürültülüdür. "beacon/dk" sahte sayfanın
+minute-watched yerine geçen isteklerinin sekme başına dakikalık sayısıdır; dondurma bunları düşürmemeli.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_helix import create_app, start_fake_helix
+
+RAPL_PATH = "/sys/class/powercap/intel-rapl:0"
+
+
+def read_energy_uj():
+    try:
+        with open(os.path.join(RAPL_PATH, "energy_uj")) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def energy_joules(start, end):
+    if start is None or end is None:
+        return None
+    if end < start:
+        # Sayaç max_energy_range_uj'de başa döner
+        try:
+            with open(os.path.join(RAPL_PATH, "max_energy_range_uj")) as f:
+                end += int(f.read())
+        except (OSError, ValueError):
+            return None
+    return (end - start) / 1e6
+
+
+def chromium_cpu_seconds(main):
+    renderer = total = 0.0
+    for child in main.script_process.children(recursive=True):
+        try:
+            times = child.cpu_times()
+            seconds = times.user + times.system
+            total += seconds
+            if "--type=renderer" in " ".join(child.cmdline()):
+                renderer += seconds
+        except Exception:
+            pass
+    return renderer, total
+
+
+async def run_variant(main, app, name, args):
+    main.page_throttler.rules = []
+    main.page_throttler.default = name
+    if not await main.init_playwright():
+        raise SystemExit("Playwright başlatılamadı")
+
+    users = [f"bench_{name}_{i}" for i in range(args.tabs)]
+    opened = await asyncio.gather(*(main.start_watching(u) for u in users))
+    main.page_throttler.start()
+    await asyncio.sleep(args.settle)
+
+    beacons0 = sum(app["beacons"].get(u, 0) for u in users)
+    (renderer0, total0), energy0, t0 = chromium_cpu_seconds(main), read_energy_uj(), time.perf_counter()
+    await asyncio.sleep(args.window)
+    (renderer1, total1), energy1 = chromium_cpu_seconds(main), read_energy_uj()
+    elapsed = time.perf_counter() - t0
+    beacons = sum(app["beacons"].get(u, 0) for u in users) - beacons0
+    joules = energy_joules(energy0, energy1)
+    stats = dict(main.page_throttler.stats)
+
+    await main.page_throttler.stop()
+    await asyncio.gather(*(main.stop_watching(u) for u in users if u in main.pages))
+    await main.context_pool.close()
+    main.shared_contexts.clear()
+    await main.browser.close()
+    await main.playwright.stop()
+    for key in main.page_throttler.stats:
+        main.page_throttler.stats[key] = 0
+
+    power = f"{joules / elapsed:6.1f}W" if joules is not None else "   n/a"
+    print(f"{name:<6} açık={sum(1 for ok in opened if ok)}/{args.tabs}  "
+          f"renderer_cpu={(renderer1 - renderer0) / elapsed * 100:6.1f}%  "
+          f"chromium_cpu={(total1 - total0) / elapsed * 100:6.1f}%  güç={power}  "
+          f"beacon/dk={beacons / args.tabs / elapsed * 60:5.2f}  "
+          f"dondurma={stats['freezes']} çözme={stats['thaws']} hata={stats['failed']}")
+
+
+async def run(args):
+    app = create_app(beacon_interval=args.beacon)
+    runner, _, _ = await start_fake_helix(app)
+    os.environ["TWITCH_CHANNEL_URL"] = app["channel_url"]
+    import main
+
+    if read_energy_uj() is None:
+        print(f"RAPL okunamadı ({RAPL_PATH}), güç ölçülmeyecek")
+    print(f"{args.tabs} sekme, {args.window}sn ölçüm penceresi, beacon aralığı {args.beacon}sn")
+    for name in args.profiles.split(","):
+        if name not in main.THROTTLE_PROFILES:
+            raise SystemExit(f"Bilinmeyen profil: {name}")
+        await run_variant(main, app, name, args)
+    await runner.cleanup()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=20)
+    parser.add_argument("--window", type=float, default=120.0)
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--profiles", default="none,light,heavy")
+    parser.add_argument("--beacon", type=float, default=10.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,144 @@
+"""İmzalı EventSub webhook mesajları gönderen yerel taklit - push modunu gerçek Twitch olmadan denemek için.
+
+Kullanım: python bench/fake_eventsub.py --url http://127.0.0.1:8080/eventsub --secret GIZLI [--login kanal]
+          [--events 200] [--concurrency 10]
+
+Önce kontrol turu: doğrulama challenge'ı, stream.online, aynı mesajın tekrarı, bozuk imza, eski zaman damgası,
+stream.offline ve revocation gönderilip beklenen HTTP kodlarıyla karşılaştırılır. --events verilirse ardından
+o kadar online/offline bildirimi gönderilip cevap süresi dağılımı raporlanır. Monitor EVENTSUB_SECRET ile
+aynı secret'la çalışmalı; --login streamers.txt'de olan bir kanal olmalı ki açılış/kapanış da tetiklensin.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+
+
+def sign(secret: str, message_id: str, timestamp: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), message_id.encode("utf-8") + timestamp.encode("utf-8") + body, hashlib.sha256).hexdigest()
+
+
+def twitch_timestamp(at: datetime = None) -> str:
+    # Twitch'in biçimi: nanosaniye hassasiyeti ve Z
+    at = at or datetime.now(timezone.utc)
+    return at.strftime("%Y-%m-%dT%H:%M:%S.") + f"{at.microsecond:06d}123Z"
+
+
+def subscription(sub_type: str, login: str, status: str = "enabled") -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "status": status,
+        "type": sub_type,
+        "version": "1",
+        "condition": {"broadcaster_user_id": str(abs(hash(login)) % 10 ** 9)},
+        "transport": {"method": "webhook", "callback": "http://localhost/eventsub"},
+        "created_at": twitch_timestamp(),
+    }
+
+
+def notification(sub_type: str, login: str) -> dict:
+    event = {"broadcaster_user_id": str(abs(hash(login)) % 10 ** 9), "broadcaster_user_login": login, "broadcaster_user_name": login}
+    if sub_type == "stream.online":
+        event.update({"id": str(uuid.uuid4()), "type": "live", "started_at": twitch_timestamp()})
+    return {"subscription": subscription(sub_type, login), "event": event}
+
+
+async def post(session, url: str, secret: str, message_type: str, payload: dict, message_id: str = None,
+               timestamp: str = None, bad_signature: bool = False):
+    body = json.dumps(payload).encode("utf-8")
+    message_id = message_id or str(uuid.uuid4())
+    timestamp = timestamp or twitch_timestamp()
+    signature = sign(secret, message_id, timestamp, body)
+    if bad_signature:
+        signature = signature[:-4] + "0000"
+    headers = {
+        "Content-Type": "application/json",
+        "Twitch-Eventsub-Message-Id": message_id,
+        "Twitch-Eventsub-Message-Retry": "0",
+        "Twitch-Eventsub-Message-Type": message_type,
+        "Twitch-Eventsub-Message-Signature": signature,
+        "Twitch-Eventsub-Message-Timestamp": timestamp,
+        "Twitch-Eventsub-Subscription-Type": payload["subscription"]["type"],
+        "Twitch-Eventsub-Subscription-Version": "1",
+    }
+    started = time.perf_counter()
+    async with session.post(url, data=body, headers=headers) as resp:
+        text = await resp.text()
+        return resp.status, text, time.perf_counter() - started
+
+
+async def run_checks(session, args) -> bool:
+    login = args.login
+    challenge = uuid.uuid4().hex
+    online_id = str(uuid.uuid4())
+    stale = twitch_timestamp(datetime.now(timezone.utc) - timedelta(minutes=20))
+    checks = [
+        ("challenge", "webhook_callback_verification", {"subscription": subscription("stream.online", login, "webhook_callback_verification_pending"), "challenge": challenge}, {}, (200, challenge)),
+        ("online", "notification", notification("stream.online", login), {"message_id": online_id}, (204, None)),
+        ("tekrar", "notification", notification("stream.online", login), {"message_id": online_id}, (204, None)),
+        ("bozuk imza", "notification", notification("stream.offline", login), {"bad_signature": True}, (403, None)),
+        ("eski mesaj", "notification", notification("stream.offline", login), {"timestamp": stale}, (403, None)),
+        ("offline", "notification", notification("stream.offline", login), {}, (204, None)),
+        ("revocation", "revocation", {"subscription": subscription("stream.online", login, "authorization_revoked")}, {}, (204, None)),
+    ]
+    ok = True
+    for name, message_type, payload, options, (want_status, want_text) in checks:
+        status, text, elapsed = await post(session, args.url, args.secret, message_type, payload, **options)
+        passed = status == want_status and (want_text is None or text == want_text)
+        ok = ok and passed
+        print(f"{name:<12} {status} {'OK' if passed else 'BEKLENEN ' + str(want_status)} ({elapsed * 1000:.1f}ms)")
+        if name == "online":
+            # Açılışın arka planda başlaması için kısa bir pay
+            await asyncio.sleep(args.settle)
+    return ok
+
+
+async def run_load(session, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one(i):
+        sub_type = "stream.online" if i % 2 == 0 else "stream.offline"
+        async with semaphore:
+            status, _, elapsed = await post(session, args.url, args.secret, "notification", notification(sub_type, args.login))
+        latencies.append(elapsed)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.events)))
+    wall = time.perf_counter() - started
+    ordered = sorted(latencies)
+    p = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+    print(f"{args.events} bildirim {wall:.2f}sn ({args.events / wall:.0f}/sn), cevap p50 {statistics.median(latencies) * 1000:.1f}ms "
+          f"p99 {p(0.99):.1f}ms max {ordered[-1] * 1000:.1f}ms, kodlar {statuses}")
+
+
+async def run(args):
+    async with aiohttp.ClientSession() as session:
+        ok = await run_checks(session, args)
+        if args.events:
+            await run_load(session, args)
+    raise SystemExit(0 if ok else 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8080/eventsub")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--login", default="bench_0")
+    parser.add_argument("--events", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--settle", type=float, default=1.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
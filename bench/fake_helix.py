@@ -0,0 +1,208 @@
+"""Yerel Helix/OAuth taklidi - benchmark'lar gerçek Twitch'e gitmeden çalışsın diye.
+
+Çevrim içi durum ya crc32 ile sabit bir orana göre ya da senaryolu bir zaman çizelgesine
+({login: [[başlangıç, bitiş], ...]}, sunucunun açılışına göre saniye) göre belirlenir.
+Helix isteklerine gecikme, gecikme sapması ve rastgele 5xx hataları enjekte edilebilir.
+"""
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from aiohttp import web
+
+
+# Twitch kanal sayfasının kaba bir taklidi: oynatıcı kabı, biraz DOM hareketi ve gecikmeli "İzlemeye Başla" kapısı
+CHANNEL_PAGE = """<!doctype html>
+<html><head><title>{login} - Twitch</title>
+<style>
+  .spinner { width: 40px; height: 40px; background: #9146ff; animation: spin 1s linear infinite; }
+  @keyframes spin { to { transform: rotate(360deg); } }
+  @media (prefers-reduced-motion: reduce) { .spinner { animation: none; } }
+</style>
+</head>
+<body>
+<div data-a-target="video-player"><video></video><div class="spinner"></div></div>
+<div id="chat"></div>
+<script>
+  // minute-watched yerine geçen sayaç: sayfa dondurulsa da bu istekler gitmeye devam etmeli
+  setInterval(() => navigator.sendBeacon('/spade?login={login}'), {beacon_ms});
+  setTimeout(() => {
+    const b = document.createElement('button');
+    b.innerHTML = '<div data-a-target="tw-core-button-label-text">İzlemeye Başla</div>';
+    b.onclick = () => { document.body.dataset.started = '1'; b.remove(); };
+    document.body.appendChild(b);
+  }, 500);
+  let n = 0;
+  setInterval(() => {
+    const line = document.createElement('div');
+    line.textContent = 'chat message ' + (n++);
+    const chat = document.getElementById('chat');
+    chat.appendChild(line);
+    if (chat.children.length > 50) chat.firstChild.remove();
+  }, 250);
+</script>
+</body></html>
+"""
+
+
+def is_online(login: str, online_ratio: float) -> bool:
+    # Deterministik: aynı login her çalıştırmada aynı sonucu verir
+    return (zlib.crc32(login.encode()) % 1000) < online_ratio * 1000
+
+
+def make_timeline(logins, duration: float, online_ratio: float, churn: float, seed: int = 1) -> dict:
+    # Yayın başına açık/kapalı süreler üstel dağılır; ortalama açık kalma süresi `churn`,
+    # kapalı kalma süresi oranı koruyacak şekilde seçilir
+    rng = random.Random(seed)
+    timeline = {}
+    off_mean = churn * (1 - online_ratio) / max(online_ratio, 1e-6)
+    for login in logins:
+        intervals = []
+        t = 0.0
+        live = rng.random() < online_ratio
+        while t < duration:
+            length = rng.expovariate(1 / churn) if live else rng.expovariate(1 / max(off_mean, 1e-6))
+            if live:
+                intervals.append([round(t, 2), round(min(t + length, duration), 2)])
+            t += length
+            live = not live
+        timeline[login] = intervals
+    return timeline
+
+
+def load_timeline(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return {login.lower(): intervals for login, intervals in json.load(f).items()}
+
+
+def create_app(latency: float = 0.05, online_ratio: float = 0.3, ratelimit: int = 800, timeline: dict = None,
+               latency_jitter: float = 0.0, error_rate: float = 0.0, seed: int = 1,
+               beacon_interval: float = 60.0) -> web.Application:
+    app = web.Application()
+    app["calls"] = {"token": 0, "streams": 0, "errors": 0}
+    app["started_at"] = time.time()
+    rng = random.Random(seed)
+
+    def online_now(login: str) -> bool:
+        if timeline is None:
+            return is_online(login, online_ratio)
+        t = time.time() - app["started_at"]
+        return any(start <= t < end for start, end in timeline.get(login, ()))
+
+    async def delay():
+        await asyncio.sleep(max(latency + rng.uniform(-latency_jitter, latency_jitter), 0))
+
+    def injected_error():
+        if error_rate and rng.random() < error_rate:
+            app["calls"]["errors"] += 1
+            return web.json_response({"error": "Service Unavailable", "status": 503}, status=rng.choice((500, 502, 503)))
+        return None
+    app["valid_tokens"] = set()
+    # Helix gibi dakikalık kova: her istek bir puan harcar
+    app["bucket"] = {"remaining": ratelimit, "reset": time.time() + 60}
+
+    def ratelimit_headers():
+        bucket = app["bucket"]
+        now = time.time()
+        if now >= bucket["reset"]:
+            bucket["remaining"] = ratelimit
+            bucket["reset"] = now + 60
+        bucket["remaining"] = max(bucket["remaining"] - 1, 0)
+        return {
+            "Ratelimit-Limit": str(ratelimit),
+            "Ratelimit-Remaining": str(bucket["remaining"]),
+            "Ratelimit-Reset": str(int(bucket["reset"])),
+        }
+
+    async def token_handler(request):
+        app["calls"]["token"] += 1
+        await delay()
+        token = f"fake-token-{app['calls']['token']}"
+        app["valid_tokens"].add(token)
+        return web.json_response({"access_token": token, "expires_in": 5000000, "token_type": "bearer"})
+
+    async def streams_handler(request):
+        app["calls"]["streams"] += 1
+        await delay()
+        error = injected_error()
+        if error is not None:
+            return error
+        headers = ratelimit_headers()
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token not in app["valid_tokens"]:
+            return web.json_response({"error": "Unauthorized", "status": 401, "message": "Invalid OAuth token"}, status=401, headers=headers)
+        logins = request.query.getall("user_login", [])
+        data = [
+            {"user_login": login, "user_name": login, "type": "live", "viewer_count": 1}
+            for login in logins
+            if online_now(login)
+        ]
+        return web.json_response({"data": data}, headers=headers)
+
+    def authorized(request) -> bool:
+        return request.headers.get("Authorization", "").removeprefix("Bearer ") in app["valid_tokens"]
+
+    async def users_handler(request):
+        app["calls"]["users"] = app["calls"].get("users", 0) + 1
+        if not authorized(request):
+            return web.json_response({"error": "Unauthorized", "status": 401}, status=401)
+        logins = request.query.getall("login", [])
+        return web.json_response({"data": [{"id": str(zlib.crc32(l.encode())), "login": l, "display_name": l} for l in logins]})
+
+    # EventSub abonelikleri sadece bellekte tutulur; doğrulama challenge'ı gönderilmez
+    app["subscriptions"] = {}
+
+    async def subscriptions_handler(request):
+        app["calls"]["eventsub"] = app["calls"].get("eventsub", 0) + 1
+        if not authorized(request):
+            return web.json_response({"error": "Unauthorized", "status": 401}, status=401)
+        subs = app["subscriptions"]
+        if request.method == "GET":
+            return web.json_response({"data": list(subs.values()), "total": len(subs), "pagination": {}})
+        if request.method == "DELETE":
+            return web.Response(status=204 if subs.pop(request.query.get("id", ""), None) else 404)
+        body = await request.json()
+        key = (body["type"], body["condition"]["broadcaster_user_id"], body["transport"]["callback"])
+        if any((s["type"], s["condition"]["broadcaster_user_id"], s["transport"]["callback"]) == key for s in subs.values()):
+            return web.json_response({"error": "Conflict", "status": 409}, status=409)
+        sub_id = f"sub-{len(subs) + 1}"
+        subs[sub_id] = {
+            "id": sub_id, "status": "enabled", "type": body["type"], "version": body.get("version", "1"),
+            "condition": body["condition"], "transport": {"method": "webhook", "callback": body["transport"]["callback"]},
+        }
+        return web.json_response({"data": [subs[sub_id]], "total": len(subs)}, status=202)
+
+    app["beacons"] = {}
+
+    async def spade_handler(request):
+        login = request.query.get("login", "")
+        app["beacons"][login] = app["beacons"].get(login, 0) + 1
+        return web.Response(status=204)
+
+    async def channel_handler(request):
+        page = CHANNEL_PAGE.replace("{login}", request.match_info["login"]).replace("{beacon_ms}", str(int(beacon_interval * 1000)))
+        return web.Response(text=page, content_type="text/html")
+
+    app.add_routes([
+        web.post("/oauth2/token", token_handler),
+        web.get("/helix/streams", streams_handler),
+        web.get("/helix/users", users_handler),
+        web.route("*", "/helix/eventsub/subscriptions", subscriptions_handler),
+        web.get("/channels/{login}", channel_handler),
+        web.post("/spade", spade_handler),
+    ])
+    return app
+
+
+async def start_fake_helix(app: web.Application, host: str = "127.0.0.1", port: int = 0):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    base = f"http://{host}:{port}"
+    # TWITCH_CHANNEL_URL bu şablona çevrilince Playwright sahte kanal sayfalarını açar
+    app["channel_url"] = f"{base}/channels/{{login}}"
+    return runner, f"{base}/oauth2/token", f"{base}/helix/streams"
@@ -1,20 +1,33 @@
 import os
+import io
+import sys
+import threading
+import traceback
 import time
+import hashlib
+import hmac
+import random
+import bisect
+import re
 import asyncio
-import requests
+import aiohttp
 import psutil
 import json
 import logging
-from datetime import datetime
-from typing import Dict
+import logging.handlers
+import sqlite3
+import queue
+import signal
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from rich.console import Console
-from rich.layout import Layout
-from rich.panel import Panel
-from rich.table import Table
-from rich.live import Live
-from rich.progress import BarColumn, Progress, TextColumn
 from rich.console import Group
 from aiohttp import web
 
@@ -29,14 +42,141 @@ TWILIGHT_USER = os.getenv("TWILIGHT_USER", "")
 
 HEADLESS_MODE = os.getenv("HEADLESS", "true").lower() in ["true", "1", "yes"]
 AUTO_START = os.getenv("AUTO_START", "true").lower() in ["true", "1", "yes"]  # Server için true
+# Daemon modunda TUI hiç kurulmaz, paneller sadece /status istenince çizilir.
+# "auto": AUTO_START açık ve terminal yoksa (systemd, container) daemon
+DAEMON = os.getenv("DAEMON", "auto").lower()
 
 STREAMERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamers.txt")
-TWITCH_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
-TWITCH_STREAMS_URL = "https://api.twitch.tv/helix/streams"
+TWITCH_TOKEN_URL = os.getenv("TWITCH_TOKEN_URL", "https://id.twitch.tv/oauth2/token")
+TWITCH_STREAMS_URL = os.getenv("TWITCH_STREAMS_URL", "https://api.twitch.tv/helix/streams")
+TWITCH_CHANNEL_URL = os.getenv("TWITCH_CHANNEL_URL", "https://www.twitch.tv/{login}")
+TWITCH_USERS_URL = os.getenv("TWITCH_USERS_URL", "https://api.twitch.tv/helix/users")
+TWITCH_EVENTSUB_URL = os.getenv("TWITCH_EVENTSUB_URL", "https://api.twitch.tv/helix/eventsub/subscriptions")
+
+# EventSub push modu: secret verilirse /eventsub webhook'u açılır ve sorgu yavaş bir uzlaştırma turuna iner
+EVENTSUB_SECRET = os.getenv("EVENTSUB_SECRET", "")
+EVENTSUB_CALLBACK_URL = os.getenv("EVENTSUB_CALLBACK_URL", "")  # verilirse abonelikler otomatik oluşturulur
+EVENTSUB_MAX_AGE = float(os.getenv("EVENTSUB_MAX_AGE", "600"))  # bundan eski mesajlar reddedilir
+EVENTSUB_RECONCILE_INTERVAL = float(os.getenv("EVENTSUB_RECONCILE_INTERVAL", "600"))
+
+HELIX_TIMEOUT = float(os.getenv("HELIX_TIMEOUT", "10"))
+HELIX_MAX_CONNECTIONS = int(os.getenv("HELIX_MAX_CONNECTIONS", "10"))
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "600"))  # saniye, süre dolmadan bu kadar önce yenile
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "5"))
+
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "500"))  # bellekte tutulan son olay sayısı
+LOG_PER_STREAMER = int(os.getenv("LOG_PER_STREAMER", "50"))  # streamer başına tutulan son olay sayısı
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # twitch_monitor.log dönüşüm boyutu
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+SYSTEM_STATS_INTERVAL = float(os.getenv("SYSTEM_STATS_INTERVAL", "5"))  # psutil örnekleme aralığı (sn)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))  # event loop gecikmesi ölçüm aralığı, 0 = kapalı
+
+DIAGNOSTICS = os.getenv("DIAGNOSTICS", "false").lower() in ["true", "1", "yes"]  # bloklama yakalayıcı ve örnekleyici profiler
+DIAG_BLOCK_THRESHOLD = float(os.getenv("DIAG_BLOCK_THRESHOLD", "0.25"))  # bundan uzun bloklayan çağrının yığını kaydedilir
+DIAG_SAMPLE_INTERVAL = float(os.getenv("DIAG_SAMPLE_INTERVAL", "0.01"))
+DIAG_PROFILE_WINDOW = float(os.getenv("DIAG_PROFILE_WINDOW", "120"))  # /debug/profile'ın geriye bakabileceği süre
+
+STREAMERS_RELOAD_INTERVAL = float(os.getenv("STREAMERS_RELOAD_INTERVAL", "5"))  # watchfiles yoksa mtime kontrol aralığı
+DEFAULT_PRIORITY = int(os.getenv("DEFAULT_PRIORITY", "0"))
+
+LEDGER_PATH = os.getenv("LEDGER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "watch_ledger.db"))
+LEDGER_FLUSH_INTERVAL = float(os.getenv("LEDGER_FLUSH_INTERVAL", "10"))  # biriken oturumların diske yazılma aralığı
+
+STATE_PATH = os.getenv("STATE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "monitor_state.json"))
+STATE_SNAPSHOT_INTERVAL = float(os.getenv("STATE_SNAPSHOT_INTERVAL", "30"))
+RESUME_MAX_AGE = float(os.getenv("RESUME_MAX_AGE", "900"))  # bundan eski snapshot'tan yayınlar geri açılmaz
+RESTORE_STAGGER = float(os.getenv("RESTORE_STAGGER", "0.25"))  # geri yüklenen açılışlar arası bekleme
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))  # kapanış için toplam süre, dolunca Chromium öldürülür
+
+DISCOVERY_INTERVAL = float(os.getenv("DISCOVERY_INTERVAL", "60"))  # tüm listede yeni yayın taraması
+CONFIRM_INTERVAL = float(os.getenv("CONFIRM_INTERVAL", "30"))  # izlenen kanalların hâlâ canlı olduğunu doğrulama
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))  # aralıkların +/- oranı
+RATELIMIT_MIN_REMAINING = int(os.getenv("RATELIMIT_MIN_REMAINING", "20"))
+
+# Tek bir eksik sonuç sayfayı kapatmaz: kanal önce "şüpheli" olur, yeterince art arda eksik görülüp
+# süre de dolunca çevrimdışı sayılır. API hatası "bilinmiyor"dur, çevrimdışı değil.
+ONLINE_CONFIRMATIONS = int(os.getenv("ONLINE_CONFIRMATIONS", "1"))  # açılış için art arda canlı görülme sayısı
+OFFLINE_CONFIRMATIONS = int(os.getenv("OFFLINE_CONFIRMATIONS", "2"))  # kapanış için art arda eksik görülme sayısı
+OFFLINE_GRACE = float(os.getenv("OFFLINE_GRACE", "60"))  # ilk eksik sonuçtan sonra kapanış için en az bekleme
+REOPEN_WINDOW = float(os.getenv("REOPEN_WINDOW", "300"))  # kapandıktan bu kadar sonra yeniden açılış "churn" sayılır
+
+POOL_SIZE = int(os.getenv("POOL_SIZE", "2"))  # önceden hazırlanıp boşta bekleyen sayfa sayısı
+POOL_IDLE_TTL = float(os.getenv("POOL_IDLE_TTL", "600"))  # bu kadar boşta kalan sayfa kapatılır
+POOL_HEALTH_TIMEOUT = float(os.getenv("POOL_HEALTH_TIMEOUT", "3"))
+
+# Tüm yayınlar aynı cookie'leri taşıdığı için tek (ya da birkaç) context'i sekme olarak paylaşabilir
+SHARED_CONTEXT = os.getenv("SHARED_CONTEXT", "false").lower() in ["true", "1", "yes"]
+CONTEXT_SHARD_SIZE = int(os.getenv("CONTEXT_SHARD_SIZE", "0"))  # context başına sekme, 0 = sınırsız
+
+LAUNCH_CONCURRENCY = int(os.getenv("LAUNCH_CONCURRENCY", "4"))  # aynı anda açılan sayfa sayısı
+LAUNCH_TIMEOUT = float(os.getenv("LAUNCH_TIMEOUT", "45"))  # tek bir açılış için süre sınırı
+NAV_TIMEOUT = float(os.getenv("NAV_TIMEOUT", "20"))
+
+MAX_PAGES = int(os.getenv("MAX_PAGES", "0"))  # aynı anda açık sayfa sınırı, 0 = boş RAM'e göre hesapla
+PAGE_MEMORY_MB = float(os.getenv("PAGE_MEMORY_MB", "150"))  # sayfa başına tahmini RAM
+MEMORY_RESERVE_MB = float(os.getenv("MEMORY_RESERVE_MB", "1024"))  # sisteme bırakılacak pay
+
+WATCHDOG_INTERVAL = float(os.getenv("WATCHDOG_INTERVAL", "60"))  # sayfa sağlık kontrolü aralığı
+WATCHDOG_RESPONSE_TIMEOUT = float(os.getenv("WATCHDOG_RESPONSE_TIMEOUT", "5"))
+WATCHDOG_MAX_UNRESPONSIVE = int(os.getenv("WATCHDOG_MAX_UNRESPONSIVE", "2"))  # art arda cevapsız kontrol sayısı
+HEAP_LIMIT_MB = float(os.getenv("HEAP_LIMIT_MB", "400"))  # JS heap mutlak sınırı
+HEAP_GROWTH_LIMIT_MB = float(os.getenv("HEAP_GROWTH_LIMIT_MB", "200"))  # açılıştaki heap'e göre büyüme sınırı
+RENDERER_RSS_LIMIT_MB = float(os.getenv("RENDERER_RSS_LIMIT_MB", "800"))  # tek bir renderer sürecinin RSS sınırı
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "15"))  # oynatıcının DOM'a girmesi için beklenen süre
+
+WORKERS = int(os.getenv("WORKERS", "1"))  # 1'den büyükse yayınlar kendi tarayıcısı olan worker süreçlerine dağıtılır
+WORKER_REPORT_INTERVAL = float(os.getenv("WORKER_REPORT_INTERVAL", "2"))  # worker durum raporu aralığı
+WORKER_HEALTH_INTERVAL = float(os.getenv("WORKER_HEALTH_INTERVAL", "5"))
+WORKER_STALE_TIMEOUT = float(os.getenv("WORKER_STALE_TIMEOUT", "30"))  # bu kadar rapor vermeyen worker öldürülür
+WORKER_REBALANCE_THRESHOLD = int(os.getenv("WORKER_REBALANCE_THRESHOLD", "2"))  # worker'lar arası izin verilen yük farkı
+
+# Engelleme profilleri. spade (minute-watched), gql ve pubsub izleme süresi/puanlar için gerekli, bilerek engellenmez.
+BLOCK_PROFILES = {
+    "default": {
+        "resource_types": ["media"],
+        "url_patterns": [r"\.m3u8(\?|$)", r"\.ts(\?|$)", r"\.mp4(\?|$)", r"\.webm(\?|$)"],
+        "hosts": [],
+        "block_chat": False,
+    },
+    "minimal": {
+        "resource_types": ["media", "image", "font", "manifest", "texttrack"],
+        "url_patterns": [r"\.m3u8(\?|$)", r"\.ts(\?|$)", r"\.mp4(\?|$)", r"\.webm(\?|$)"],
+        "hosts": [
+            "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+            "google-analytics.com", "imasdk.googleapis.com", "amazon-adsystem.com", "scorecardresearch.com",
+            "adsrvr.org", "branch.io", "sentry.io", "cdn.segment.com",
+        ],
+        "block_chat": True,
+    },
+}
+BLOCK_PROFILE = os.getenv("BLOCK_PROFILE", "default").lower()
+# Profile eklenecek ek kurallar, virgülle ayrılmış (URL desenleri regex)
+BLOCK_RESOURCE_TYPES = [t.strip() for t in os.getenv("BLOCK_RESOURCE_TYPES", "").split(",") if t.strip()]
+BLOCK_URL_PATTERNS = [p.strip() for p in os.getenv("BLOCK_URL_PATTERNS", "").split(",") if p.strip()]
+BLOCK_HOSTS = [h.strip() for h in os.getenv("BLOCK_HOSTS", "").split(",") if h.strip()]
+
+# Arka plandaki izleme sekmeleri için CDP kaynak profilleri. cpu_rate renderer'ı yavaşlatır (1 = tam hız),
+# reduced_motion animasyonları kapatır; freeze > 0 ise sayfa dondurulur ve spade (minute-watched) gibi
+# zamanlayıcılar çalışabilsin diye her freeze saniyede bir thaw saniyeliğine çözülür.
+THROTTLE_PROFILES = {
+    "none": {"cpu_rate": 1, "reduced_motion": False, "freeze": 0, "thaw": 0},
+    "light": {"cpu_rate": 2, "reduced_motion": True, "freeze": 0, "thaw": 0},
+    "heavy": {
+        "cpu_rate": 4,
+        "reduced_motion": True,
+        "freeze": float(os.getenv("THROTTLE_FREEZE_SECONDS", "45")),
+        "thaw": float(os.getenv("THROTTLE_THAW_SECONDS", "15")),
+    },
+}
+# "öncelik:profil" virgülle ayrılmış, örn. "5:none,1:light"; kanal önceliğinin karşıladığı en yüksek eşiği kullanır
+THROTTLE_POLICY = os.getenv("THROTTLE_POLICY", "")
+THROTTLE_DEFAULT = os.getenv("THROTTLE_DEFAULT", "none").lower()  # hiçbir eşiğe uymayan kanalların profili
 
 def get_html_status(online_streamers, all_streamers):
     left, middle, right = render_panels(online_streamers, all_streamers)
-    tmp_console = Console(record=True, width=120)
+    # Çıktı terminale değil, sadece kayda gitsin
+    tmp_console = Console(record=True, width=120, file=io.StringIO())
     tmp_console.print(left)
     tmp_console.print(middle)
     tmp_console.print(right)
@@ -45,23 +185,177 @@ def get_html_status(online_streamers, all_streamers):
 async def keep_alive_handler(request):
     return web.Response(text=f"Twitch Monitor is alive. Uptime: {format_minutes(time.time() - start_time)}")
 
+def get_status_snapshot():
+    now = time.time()
+    return {
+        "uptime": int(now - start_time),
+        "daemon": daemon_mode,
+        "streamers": len(streamer_view),
+        "online": sorted(current_online),
+        "api": {
+            **helix_stats,
+            "per_hour": round(get_api_rate(), 1),
+            "polls": dict(poll_scheduler.counts),
+        },
+        "pool": {"idle": len(context_pool.idle), **context_pool.stats},
+        "blocking": {"profile": BLOCK_PROFILE, **get_block_summary()},
+        "slots": {
+            "occupied": slot_manager.occupied(),
+            "capacity": slot_manager.capacity(),
+            **slot_manager.stats,
+            "recent": [
+                {"ts": int(ts), "user": user, "decision": decision, "victim": victim}
+                for ts, user, decision, victim in slot_manager.decisions
+            ],
+        },
+        "launcher": {
+            "queue_depth": stream_launcher.depth(),
+            "in_flight": stream_launcher.in_flight,
+            **stream_launcher.stats,
+            **stream_launcher.percentiles(),
+        },
+        "restore": dict(restore_stats),
+        "eventsub": {"enabled": eventsub.enabled, "push_active": eventsub.push_active, **eventsub.stats},
+        "channels": {**channel_states.counts(), **channel_states.stats},
+        "throttle": {
+            "policy": [f"{threshold}:{name}" for threshold, name in page_throttler.rules],
+            "default": page_throttler.default,
+            "profiles": page_throttler.counts(),
+            "frozen": sum(1 for user in pages if page_throttler.is_frozen(user)),
+            **page_throttler.stats,
+        },
+        "watchdog": {**page_watchdog.stats, "reasons": dict(page_watchdog.reasons)},
+        "workers": {
+            "count": WORKERS,
+            **(shard_supervisor.stats if shard_supervisor else {}),
+            "processes": shard_supervisor.snapshot() if shard_supervisor else [],
+        },
+        "watching": [
+            {
+                "user": user,
+                "since": int(watch_times.get(user, now)),
+                "elapsed": int(now - watch_times.get(user, now)),
+                "live": user in current_online,
+                "state": channel_states.state(user),
+                "requests": block_stats.get(user, {}),
+                "heap_mb": round(page_watchdog.samples.get(user, {}).get("heap", 0.0), 1),
+                "throttle": page_throttler.profile(user),
+                "frozen": page_throttler.is_frozen(user),
+                "worker": pages[user] if shard_supervisor else None,
+            }
+            for user in pages
+        ],
+    }
+
 async def status_handler(request):
+    # Monitor'ün elindeki durumdan render edilir; HTML kısa bir TTL boyunca önbellekte tutulur
     try:
-        token = get_app_token()
-        streamers = read_streamers(STREAMERS_FILE)
-        online = get_online_streamers(streamers, token)
-        html = get_html_status(online, streamers)
-        return web.Response(text=html, content_type="text/html")
+        now = time.time()
+        if status_cache["html"] is None or now >= status_cache["expires"]:
+            html = get_html_status(current_online, streamer_view)
+            status_cache["html"] = html
+            status_cache["etag"] = '"' + hashlib.md5(html.encode("utf-8")).hexdigest() + '"'
+            status_cache["expires"] = now + STATUS_CACHE_TTL
+        headers = {"ETag": status_cache["etag"], "Cache-Control": f"max-age={int(STATUS_CACHE_TTL)}"}
+        if status_cache["etag"] in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=status_cache["html"], content_type="text/html", headers=headers)
     except Exception as e:
         return web.Response(text=f"Error: {e}", content_type="text/plain")
 
+async def status_json_handler(request):
+    return web.json_response(get_status_snapshot())
+
+async def watchtime_handler(request):
+    try:
+        days = int(request.query["days"]) if request.query.get("days") else None
+    except ValueError:
+        return web.json_response({"error": "days bir sayı olmalı"}, status=400)
+    now = time.time()
+    # Henüz kapanmamış oturumlar deftere yazılmadı; ayrı alan olarak eklenir
+    active = {user: int(now - start) for user, start in watch_times.items()}
+    channel = request.query.get("channel", "").lower()
+    if channel:
+        rows = await watch_ledger.daily(channel, days)
+        return web.json_response({
+            "channel": channel,
+            "total_seconds": int(sum(r[1] for r in rows)),
+            "active_seconds": active.get(channel, 0),
+            "days": [{"day": day, "seconds": int(seconds), "sessions": sessions} for day, seconds, sessions in rows],
+        })
+    rows = await watch_ledger.totals(days)
+    return web.json_response({
+        "channels": [{"channel": c, "seconds": int(seconds), "sessions": sessions} for c, seconds, sessions in rows],
+        "active": active,
+    })
+
+async def metrics_handler(request):
+    # Alt süreç taraması bloklayıcı; loop'u tutmasın
+    process_lines = await asyncio.to_thread(collect_process_metrics)
+    return web.Response(body=render_metrics(process_lines).encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def debug_profile_handler(request):
+    if not loop_diagnostics.enabled:
+        return web.json_response({"error": "Tanılama kapalı, DIAGNOSTICS=true ile başlatın"}, status=503)
+    try:
+        seconds = min(float(request.query.get("seconds", "30")), DIAG_PROFILE_WINDOW)
+    except ValueError:
+        return web.json_response({"error": "seconds bir sayı olmalı"}, status=400)
+    count, stacks = await asyncio.to_thread(loop_diagnostics.profile, seconds)
+    if request.query.get("format") == "top":
+        return web.json_response({
+            "seconds": seconds,
+            "samples": count,
+            "interval": DIAG_SAMPLE_INTERVAL,
+            **loop_diagnostics.top(stacks),
+        })
+    # Varsayılan: flamegraph.pl / speedscope'un okuduğu "folded" format
+    lines = [f"{';'.join(stack)} {n}" for stack, n in sorted(stacks.items(), key=lambda kv: kv[1], reverse=True)]
+    return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
+async def debug_stalls_handler(request):
+    if not loop_diagnostics.enabled:
+        return web.json_response({"error": "Tanılama kapalı, DIAGNOSTICS=true ile başlatın"}, status=503)
+    return web.json_response({
+        "threshold": DIAG_BLOCK_THRESHOLD,
+        **loop_diagnostics.stats,
+        "stalls": [
+            {"at": round(s["at"], 3), "duration": round(s["duration"], 3), "stack": "".join(s["stack"])}
+            for s in reversed(loop_diagnostics.stalls)
+        ],
+    })
+
+async def eventsub_handler(request):
+    if not eventsub.enabled:
+        return web.Response(status=404)
+    return await eventsub.handle(request)
+
+async def events_handler(request):
+    try:
+        n = max(1, min(int(request.query.get("n", "50")), LOG_BUFFER_SIZE))
+    except ValueError:
+        n = 50
+    streamer = request.query.get("streamer", "").lower()
+    if streamer:
+        events = event_log.for_streamer(streamer, n)
+    else:
+        events = event_log.recent(n, request.query.get("level"))
+    return web.json_response([e.to_dict() for e in events])
+
 async def start_keep_alive_server():
     host = '0.0.0.0'
     port = int(os.getenv("PORT", 8080))
     app = web.Application()
     app.add_routes([
         web.get('/', keep_alive_handler),
-        web.get('/status', status_handler)
+        web.get('/status', status_handler),
+        web.get('/status.json', status_json_handler),
+        web.get('/events', events_handler),
+        web.get('/watchtime', watchtime_handler),
+        web.get('/metrics', metrics_handler),
+        web.post('/eventsub', eventsub_handler),
+        web.get('/debug/profile', debug_profile_handler),
+        web.get('/debug/stalls', debug_stalls_handler),
     ])
     runner = web.AppRunner(app)
     await runner.setup()
@@ -73,7 +367,9 @@ def setup_logger():
     logger = logging.getLogger('TwitchMonitor')
     logger.setLevel(logging.INFO)
     
-    file_handler = logging.FileHandler('twitch_monitor.log')
+    file_handler = logging.handlers.RotatingFileHandler(
+        'twitch_monitor.log', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
     file_handler.setLevel(logging.INFO)
     
     console_handler = logging.StreamHandler()
@@ -90,63 +386,1151 @@ def setup_logger():
 
 logger = setup_logger()
 
+class LogEvent(NamedTuple):
+    ts: float
+    level: str
+    event: str
+    message: str
+    streamer: Optional[str] = None
+
+    def format(self) -> str:
+        return f"[{time.strftime('%H:%M:%S', time.localtime(self.ts))}] {self.message}"
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+class EventLog:
+    def __init__(self, size: int, per_streamer: int):
+        # deque(maxlen) eklemede O(1), dolunca en eskiyi kendisi atar
+        self.events = deque(maxlen=size)
+        self.per_streamer = per_streamer
+        self.by_streamer: Dict[str, deque] = {}
+        self.version = 0
+
+    def add(self, message: str, level: str = "info", event: str = "info", streamer: Optional[str] = None) -> LogEvent:
+        record = LogEvent(time.time(), level, event, message, streamer)
+        self.events.append(record)
+        if streamer:
+            bucket = self.by_streamer.get(streamer)
+            if bucket is None:
+                bucket = self.by_streamer[streamer] = deque(maxlen=self.per_streamer)
+            bucket.append(record)
+        self.version += 1
+        return record
+
+    def recent(self, n: int = 20, level: Optional[str] = None) -> list:
+        # Sondan geriye doğru yürünür, tüm tamponu kopyalamaya gerek yok
+        newest = (e for e in reversed(self.events) if level is None or e.level == level)
+        return list(islice(newest, n))[::-1]
+
+    def for_streamer(self, streamer: str, n: int = 20) -> list:
+        return list(self.by_streamer.get(streamer, ()))[-n:]
+
+    def forget(self, streamer: str):
+        self.by_streamer.pop(streamer, None)
+
+    def __len__(self):
+        return len(self.events)
+
+event_log = EventLog(LOG_BUFFER_SIZE, LOG_PER_STREAMER)
+
+def add_log(message: str, level: str = "info", event: str = "info", streamer: Optional[str] = None):
+    event_log.add(message, level, event, streamer)
+
+metric_registry = []
+
+def format_sample(value) -> str:
+    # :g 6 basamakta keser; uzun süre çalışan sayaçlar 1.23457e+06'da takılı kalırdı
+    return repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+        self.remote = {}  # worker -> o worker'ın son raporladığı değerler
+        metric_registry.append(self)
+
+    def export(self) -> list:
+        return list(self.values.items())
+
+    def _format_labels(self, key, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1.0):
+        key = tuple(str(v) for v in label_values)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def merged(self) -> dict:
+        total = dict(self.values)
+        for items in self.remote.values():
+            for key, value in items:
+                total[key] = total.get(key, 0.0) + value
+        return total
+
+    def render(self) -> list:
+        return [f"{self.name}{self._format_labels(key)} {format_sample(value)}" for key, value in sorted(self.merged().items())]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values):
+        key = tuple(str(v) for v in label_values)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        # Kova sayaçları kümülatif değil tutulur, toplama sadece scrape anında yapılır
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def time(self, *label_values) -> "HistogramTimer":
+        return HistogramTimer(self, label_values)
+
+    def merged(self) -> dict:
+        total = {key: [list(counts), s, n] for key, (counts, s, n) in self.values.items()}
+        for items in self.remote.values():
+            for key, (counts, s, n) in items:
+                entry = total.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += s
+                entry[2] += n
+        return total
+
+    def render(self) -> list:
+        lines = []
+        for key, (counts, total, count) in sorted(self.merged().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {format_sample(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+class HistogramTimer:
+    def __init__(self, histogram: Histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 45)
+helix_latency = Histogram("watchbot_helix_request_seconds", "Helix/OAuth istek süresi", LATENCY_BUCKETS, ("endpoint",))
+helix_errors = Counter("watchbot_helix_errors_total", "Başarısız Helix/OAuth istekleri", ("endpoint", "reason"))
+token_refreshes = Counter("watchbot_token_refreshes_total", "App token yenilemeleri", ("result",))
+start_phase_seconds = Histogram("watchbot_start_phase_seconds", "start_watching aşama süreleri", LATENCY_BUCKETS, ("phase",))
+start_results = Counter("watchbot_start_total", "Yayın açılışları", ("result",))
+stop_seconds = Histogram("watchbot_stop_seconds", "stop_watching süresi", (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+loop_lag_seconds = Histogram("watchbot_event_loop_lag_seconds", "Event loop gecikmesi", (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+
+class LoopLagMonitor:
+    # Kısa bir uykunun ne kadar geç uyandığı, loop'u bloklayan işlerin doğrudan ölçüsü
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self._task = None
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.last = lag
+            self.max = max(self.max, lag)
+            loop_lag_seconds.observe(lag)
+
+    def start(self):
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+loop_lag_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL)
+
+class LoopDiagnostics:
+    # Ayrı bir thread, loop thread'inin yığınını örnekler; loop'un kalp atışı gecikirse o anki yığını kaydeder
+    def __init__(self, threshold: float, sample_interval: float, window: float):
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.window = window
+        self.samples = deque(maxlen=max(int(window / sample_interval), 1))
+        self.stalls = deque(maxlen=50)
+        self.stats = {"samples": 0, "stalls": 0, "longest": 0.0}
+        self.beat = time.monotonic()
+        self._loop = None
+        self._loop_thread = None
+        self._handle = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self._thread is not None
+
+    def _heartbeat(self):
+        self.beat = time.monotonic()
+        self._handle = self._loop.call_later(self.threshold / 4, self._heartbeat)
+
+    def _report(self, stall: dict):
+        self.stats["longest"] = max(self.stats["longest"], stall["duration"])
+        where = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "?"
+        add_log(f"Event loop {stall['duration']:.2f}sn bloklandı: {where}", level="warning", event="loop_stall")
+        logger.warning(f"Event loop {stall['duration']:.2f}sn bloklandı:\n{''.join(stall['stack'])}")
+
+    def _run(self):
+        current = None
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = []
+            f = frame
+            while f is not None:
+                stack.append(f"{os.path.basename(f.f_code.co_filename)}:{f.f_code.co_name}")
+                f = f.f_back
+            self.samples.append((time.time(), tuple(reversed(stack))))
+            self.stats["samples"] += 1
+            
+            blocked = time.monotonic() - self.beat
+            if blocked > self.threshold:
+                if current is None:
+                    # Yığın, bloklama sürerken yakalanır; suçlu çağrı hâlâ en üstte
+                    current = {"at": time.time() - blocked, "duration": blocked, "stack": traceback.format_stack(frame)}
+                    self.stalls.append(current)
+                    self.stats["stalls"] += 1
+                else:
+                    current["duration"] = blocked
+            elif current is not None:
+                self._loop.call_soon_threadsafe(self._report, current)
+                current = None
+            del frame, f
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.beat = time.monotonic()
+        self._heartbeat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-diagnostics", daemon=True)
+        self._thread.start()
+        logger.info(f"Tanılama modu açık: eşik {self.threshold * 1000:.0f}ms, örnekleme {self.sample_interval * 1000:.0f}ms, pencere {self.window:.0f}sn")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def profile(self, seconds: float) -> Tuple[int, Dict[tuple, int]]:
+        cutoff = time.time() - seconds
+        stacks = {}
+        count = 0
+        for ts, stack in list(self.samples):
+            if ts >= cutoff:
+                stacks[stack] = stacks.get(stack, 0) + 1
+                count += 1
+        return count, stacks
+
+    def top(self, stacks: Dict[tuple, int], n: int = 25) -> dict:
+        own = {}
+        total = {}
+        for stack, count in stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for frame in set(stack):
+                total[frame] = total.get(frame, 0) + count
+        ranked = lambda d: [{"frame": k, "samples": v} for k, v in sorted(d.items(), key=lambda kv: kv[1], reverse=True)[:n]]
+        return {"self": ranked(own), "total": ranked(total)}
+
+loop_diagnostics = LoopDiagnostics(DIAG_BLOCK_THRESHOLD, DIAG_SAMPLE_INTERVAL, DIAG_PROFILE_WINDOW)
+chromium_processes = {}  # pid -> psutil.Process; cpu_percent bir önceki scrape'ten bu yana ölçer
+
+def collect_process_metrics() -> list:
+    lines = []
+    seen = set()
+    for child in script_process.children(recursive=True):
+        process = chromium_processes.get(child.pid)
+        if process is None:
+            process = chromium_processes[child.pid] = child
+        seen.add(child.pid)
+        try:
+            cmdline = process.cmdline()
+            kind = next((a.split("=", 1)[1] for a in cmdline if a.startswith("--type=")), "browser")
+            if "python" in os.path.basename(cmdline[0] if cmdline else "").lower():
+                kind = "worker"
+            labels = f'{{pid="{child.pid}",type="{kind}"}}'
+            lines.append(("watchbot_chromium_cpu_percent", f"watchbot_chromium_cpu_percent{labels} {format_sample(process.cpu_percent(None))}"))
+            lines.append(("watchbot_chromium_rss_bytes", f"watchbot_chromium_rss_bytes{labels} {process.memory_info().rss}"))
+        except (psutil.NoSuchProcess, psutil.AccessDenied, IndexError):
+            pass
+    for pid in list(chromium_processes):
+        if pid not in seen:
+            del chromium_processes[pid]
+    return lines
+
+def render_metrics(process_lines: list) -> str:
+    out = []
+    for metric in metric_registry:
+        out.append(f"# HELP {metric.name} {metric.help_text}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.render())
+    gauges = [
+        ("watchbot_open_pages", "Açık izleme sayfaları", len(pages)),
+        ("watchbot_launch_queue_depth", "Açılış kuyruğunda bekleyen kanallar", stream_launcher.depth()),
+        ("watchbot_launch_in_flight", "Şu an açılmakta olan kanallar", stream_launcher.in_flight),
+        ("watchbot_online_streamers", "Canlı görünen kanallar", len(current_online)),
+        ("watchbot_frozen_pages", "Şu an dondurulmuş izleme sayfaları", sum(1 for user in pages if page_throttler.is_frozen(user))),
+        ("watchbot_event_loop_lag_last_seconds", "Son ölçülen event loop gecikmesi", loop_lag_monitor.last),
+        ("watchbot_event_loop_lag_max_seconds", "Süreç başından beri en büyük event loop gecikmesi", loop_lag_monitor.max),
+    ]
+    for name, help_text, value in gauges:
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} gauge")
+        out.append(f"{name} {format_sample(value)}")
+    for name, help_text in (("watchbot_chromium_cpu_percent", "Alt süreç başına CPU yüzdesi"), ("watchbot_chromium_rss_bytes", "Alt süreç başına RSS")):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} gauge")
+        out.extend(line for metric_name, line in process_lines if metric_name == name)
+    return "\n".join(out) + "\n"
+
 console = Console()
 playwright = None
 browser = None
+http_session = None
+background_tasks = set()
 contexts = {}
 pages = {}
+shared_contexts = []
+page_owners = {}
+block_stats = {}
+block_totals = {"blocked": 0, "allowed": 0, "bytes_saved": 0}
+shared_context_lock = asyncio.Lock()
 watch_times = {}
-logs = []
+current_online = {}
+streamer_meta = {}
+restore_stats = {"requested": 0, "restored": 0, "seconds": None}
+status_cache = {"html": None, "etag": None, "expires": 0.0}
+system_stats_cache = {"value": None, "at": 0.0}
+helix_stats = {"requests": 0, "errors": 0, "ratelimit_remaining": None, "ratelimit_reset": None}
 start_time = time.time()
 headless_mode = True
+daemon_mode = False
 script_process = psutil.Process()
+shard_supervisor = None
+worker_index = None
+worker_assigned = set()
+state_loaded = False  # snapshot okunup uygulanmadan kapanışta üzerine yazılmaz
 
-def get_app_token() -> str:
-    try:
-        resp = requests.post(
-            TWITCH_TOKEN_URL,
-            data={"client_id": CLIENT_ID, "client_secret": CLIENT_SECRET, "grant_type": "client_credentials"},
-            timeout=10,
+def spawn(coro) -> asyncio.Task:
+    # create_task yalnızca zayıf referans tutar; arka plan görevleri burada yaşar
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def get_http_session() -> aiohttp.ClientSession:
+    # Tüm Helix/OAuth istekleri tek bir keep-alive bağlantı havuzunu paylaşır
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(limit=HELIX_MAX_CONNECTIONS, keepalive_timeout=60, ttl_dns_cache=300)
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HELIX_TIMEOUT),
         )
-        resp.raise_for_status()
+    return http_session
+
+async def close_http_session():
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+class HelixUnauthorized(Exception):
+    pass
+
+def error_reason(e: Exception) -> str:
+    status = getattr(e, "status", None)
+    return str(status) if status else type(e).__name__
+
+async def fetch_app_token() -> Tuple[str, int]:
+    try:
+        session = await get_http_session()
+        with helix_latency.time("token"):
+            async with session.post(
+                TWITCH_TOKEN_URL,
+                data={"client_id": CLIENT_ID or "", "client_secret": CLIENT_SECRET or "", "grant_type": "client_credentials"},
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
         logger.info("Twitch API token başarıyla alındı")
-        return resp.json()["access_token"]
+        return data["access_token"], int(data.get("expires_in", 3600))
     except Exception as e:
+        helix_errors.inc("token", error_reason(e))
         logger.error(f"Twitch API token alma hatası: {e}")
         raise
 
-def read_streamers(path: str):
+class TokenManager:
+    def __init__(self, refresh_margin: int):
+        self.refresh_margin = refresh_margin
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.refresh_count = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def is_valid(self) -> bool:
+        return bool(self.token) and time.time() < self.expires_at - self.refresh_margin
+
+    async def get(self) -> str:
+        if self.is_valid():
+            return self.token
+        return await self.refresh()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> str:
+        async with self._lock:
+            # Kilidi beklerken başka bir coroutine zaten yenilediyse tekrar OAuth'a gitme
+            if self.is_valid() and (stale_token is None or self.token != stale_token):
+                return self.token
+            try:
+                token, expires_in = await fetch_app_token()
+            except Exception:
+                token_refreshes.inc("error")
+                raise
+            token_refreshes.inc("ok")
+            self.token = token
+            self.expires_at = time.time() + expires_in
+            self.refresh_count += 1
+            return token
+
+    async def _refresh_loop(self):
+        while True:
+            delay = max(self.expires_at - self.refresh_margin - time.time(), 30)
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh(stale_token=self.token)
+                add_log("Token yenilendi", event="token")
+            except Exception as e:
+                add_log(f"Token yenilenme hatası: {str(e)}", level="error", event="token")
+                logger.error(f"Token yenilenme hatası: {e}")
+                await asyncio.sleep(30)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+token_manager = TokenManager(TOKEN_REFRESH_MARGIN)
+
+async def get_app_token() -> str:
+    return await token_manager.get()
+
+def parse_streamer_line(line: str):
+    # Biçim: "kanal" ya da "kanal 5" / "kanal,5" (öncelik, büyük olan önce). '#' sonrası yorum.
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    parts = line.replace(",", " ").split()
+    login = parts[0].lower()
+    priority = DEFAULT_PRIORITY
+    if len(parts) > 1:
+        try:
+            priority = int(parts[1])
+        except ValueError:
+            logger.warning(f"streamers.txt: '{login}' için geçersiz öncelik '{parts[1]}'")
+    return login, {"priority": priority}
+
+def read_streamers(path: str) -> Optional[Dict[str, dict]]:
     try:
+        streamers = {}
         with open(path, "r", encoding="utf-8") as f:
-            streamers = [l.strip().lower() for l in f if l.strip()]
+            for l in f:
+                parsed = parse_streamer_line(l)
+                if parsed is None:
+                    continue
+                login, meta = parsed
+                # Tekrar eden satırlar tek kayıt olur, yüksek öncelik kazanır
+                existing = streamers.get(login)
+                if existing is None or meta["priority"] > existing["priority"]:
+                    streamers[login] = meta
         logger.info(f"{len(streamers)} streamer streamers.txt'den yüklendi")
         return streamers
     except FileNotFoundError:
         logger.error(f"streamers.txt dosyası bulunamadı: {path}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"streamers.txt okuma hatası: {e}")
-        return []
+        return None
+
+def get_streamer_priority(user: str) -> int:
+    meta = streamer_meta.get(user)
+    return meta["priority"] if meta else DEFAULT_PRIORITY
+
+async def reload_streamers(path: str):
+    loaded = read_streamers(path)
+    if loaded is None:
+        return
+    if not loaded and streamer_meta:
+        # Editörler dosyayı önce boşaltıp sonra yazabilir; tek seferlik boş okuma listeyi silmesin
+        logger.warning("streamers.txt boş okundu, değişiklik yok sayıldı")
+        return
+    
+    added = [u for u in loaded if u not in streamer_meta]
+    removed = [u for u in streamer_meta if u not in loaded]
+    changed = [u for u in loaded if u in streamer_meta and loaded[u] != streamer_meta[u]]
+    if not added and not removed and not changed:
+        return
+    
+    streamer_meta.clear()
+    streamer_meta.update(loaded)
+    streamer_view.replace(streamer_meta)
+    add_log(f"streamers.txt yenilendi: +{len(added)} / -{len(removed)} / ~{len(changed)}", event="streamers")
+    
+    if removed and eventsub.enabled:
+        spawn(eventsub.unsubscribe(removed))
+    for user in removed:
+        stream_launcher.cancel(user)
+        current_online.pop(user, None)
+        event_log.forget(user)
+        slot_manager.forget(user)
+        channel_states.forget(user)
+    closing = [u for u in removed if u in pages]
+    if closing:
+        await asyncio.gather(*(close_stream(u) for u in closing), return_exceptions=True)
+    for user in changed:
+        # Öncelik değişmiş olabilir; açık sayfanın kısma profili yeniden seçilir
+        if shard_supervisor is not None:
+            shard_supervisor.retune(user)
+        elif user in pages:
+            spawn(page_throttler.retune(user))
+    dashboard.mark_dirty()
+    
+    if added:
+        if eventsub.enabled:
+            spawn(eventsub.sync_subscriptions(added))
+        # Sadece yeni eklenenler sorgulanır, tüm listeyi yeniden taramaya gerek yok
+        online = await get_online_streamers(added)
+        await apply_online_result(online, added)
+
+async def watch_streamers_file(path: str):
+    try:
+        from watchfiles import awatch
+    except ImportError:
+        awatch = None
+    
+    if awatch is not None:
+        # inotify/FSEvents: dosya değişmedikçe hiç uyanmaz. Editörler dosyayı yeniden
+        # oluşturabildiği için klasör izlenip yol filtrelenir.
+        target = os.path.abspath(path)
+        async for _ in awatch(os.path.dirname(target), watch_filter=lambda change, p: os.path.abspath(p) == target):
+            try:
+                await reload_streamers(path)
+            except Exception as e:
+                logger.error(f"streamers.txt yenileme hatası: {e}")
+        return
+    
+    # watchfiles yoksa mtime kontrolü: birkaç saniyede bir tek stat çağrısı
+    last = None
+    while True:
+        try:
+            stat = os.stat(path)
+            current = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            current = None
+        if last is not None and current is not None and current != last:
+            await asyncio.sleep(0.5)
+            try:
+                await reload_streamers(path)
+            except Exception as e:
+                logger.error(f"streamers.txt yenileme hatası: {e}")
+        if current is not None:
+            last = current
+        await asyncio.sleep(STREAMERS_RELOAD_INTERVAL)
+
+def split_by_day(start: float, stop: float):
+    # Gece yarısını aşan oturum, günlük toplamlara gün gün dağıtılır (yerel saat)
+    current = start
+    while current < stop:
+        day = datetime.fromtimestamp(current)
+        next_midnight = datetime(day.year, day.month, day.day) + timedelta(days=1)
+        end = min(stop, next_midnight.timestamp())
+        yield day.strftime("%Y-%m-%d"), end - current
+        current = end
+
+class WatchLedger:
+    def __init__(self, path: str, flush_interval: float):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.written = 0
+        # sqlite bağlantısı tek bir thread'e ait; tüm disk işleri bu executor'da sıralı çalışır
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watch-ledger")
+        self._conn = None
+        self._task = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id INTEGER PRIMARY KEY,
+                    channel TEXT NOT NULL,
+                    start REAL NOT NULL,
+                    stop REAL NOT NULL,
+                    duration REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS sessions_channel_start ON sessions (channel, start);
+                CREATE TABLE IF NOT EXISTS daily_totals (
+                    channel TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    sessions INTEGER NOT NULL,
+                    PRIMARY KEY (channel, day)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS daily_totals_day ON daily_totals (day);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _write(self, batch):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO sessions (channel, start, stop, duration) VALUES (?, ?, ?, ?)",
+                [(channel, start, stop, stop - start) for channel, start, stop in batch],
+            )
+            # Günlük toplamlar yazma anında güncellenir, sorgular aylarca geçmişi taramaz
+            rows = []
+            for channel, start, stop in batch:
+                for i, (day, seconds) in enumerate(split_by_day(start, stop)):
+                    rows.append((channel, day, seconds, 1 if i == 0 else 0))
+            conn.executemany(
+                """INSERT INTO daily_totals (channel, day, seconds, sessions) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (channel, day) DO UPDATE SET
+                       seconds = seconds + excluded.seconds,
+                       sessions = sessions + excluded.sessions""",
+                rows,
+            )
+
+    def _totals(self, since: Optional[str]):
+        conn = self._connect()
+        query = "SELECT channel, SUM(seconds), SUM(sessions) FROM daily_totals"
+        params = ()
+        if since:
+            query += " WHERE day >= ?"
+            params = (since,)
+        query += " GROUP BY channel ORDER BY SUM(seconds) DESC"
+        return conn.execute(query, params).fetchall()
+
+    def _daily(self, channel: str, since: Optional[str]):
+        conn = self._connect()
+        query = "SELECT day, seconds, sessions FROM daily_totals WHERE channel = ?"
+        params = (channel,)
+        if since:
+            query += " AND day >= ?"
+            params = (channel, since)
+        query += " ORDER BY day"
+        return conn.execute(query, params).fetchall()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def record(self, channel: str, start: float, stop: float):
+        if stop > start:
+            self.buffer.append((channel, start, stop))
+
+    async def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            await self._run(self._write, batch)
+            self.written += len(batch)
+        except Exception as e:
+            # Yazılamayan oturumlar kaybolmasın, bir sonraki turda tekrar denenir
+            self.buffer[:0] = batch
+            logger.error(f"İzleme defteri yazma hatası: {e}")
+
+    async def totals(self, days: Optional[int] = None):
+        return await self._run(self._totals, self._since(days))
+
+    async def daily(self, channel: str, days: Optional[int] = None):
+        return await self._run(self._daily, channel, self._since(days))
+
+    def _since(self, days: Optional[int]) -> Optional[str]:
+        if not days:
+            return None
+        return (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+watch_ledger = WatchLedger(LEDGER_PATH, LEDGER_FLUSH_INTERVAL)
 
 def chunked(lst, n):
     for i in range(0, len(lst), n):
         yield lst[i:i+n]
 
-def get_online_streamers(usernames, token) -> Dict[str, dict]:
-    headers = {"Authorization": f"Bearer {token}", "Client-Id": CLIENT_ID}
+class PollScheduler:
+    def __init__(self, discovery_interval: float, confirm_interval: float, jitter: float, min_remaining: int):
+        self.discovery_interval = discovery_interval
+        self.confirm_interval = confirm_interval
+        self.jitter = jitter
+        self.min_remaining = min_remaining
+        self.next_discovery = 0.0
+        self.next_confirm = 0.0
+        self.backoff_until = 0.0
+        self.counts = {"discovery": 0, "confirm": 0, "backoff": 0}
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due(self, now: float) -> Optional[str]:
+        if now < self.backoff_until:
+            return None
+        if now >= self.next_discovery:
+            return "discovery"
+        if now >= self.next_confirm:
+            return "confirm"
+        return None
+
+    def mark(self, kind: str, now: float):
+        self.counts[kind] += 1
+        self.next_confirm = now + self._jittered(self.confirm_interval)
+        if kind == "discovery":
+            self.next_discovery = now + self._jittered(self.discovery_interval)
+
+    def trigger_discovery(self):
+        self.next_discovery = 0.0
+
+    def observe_ratelimit(self, status: int, headers):
+        # Helix kova tabanlı limit kullanır: kalan hak azaldığında reset zamanına kadar bekle
+        try:
+            remaining = int(headers.get("Ratelimit-Remaining", ""))
+            reset = float(headers.get("Ratelimit-Reset", ""))
+        except ValueError:
+            return
+        helix_stats["ratelimit_remaining"] = remaining
+        helix_stats["ratelimit_reset"] = reset
+        if status == 429 or remaining < self.min_remaining:
+            if self.backoff_until < reset:
+                until = reset + random.uniform(0, 1)
+                self.backoff_until = until
+                self.counts["backoff"] += 1
+                logger.warning(f"Helix rate limit yaklaştı (kalan {remaining}), {until - time.time():.0f}sn bekleniyor")
+
+poll_scheduler = PollScheduler(DISCOVERY_INTERVAL, CONFIRM_INTERVAL, POLL_JITTER, RATELIMIT_MIN_REMAINING)
+
+channel_transitions = Counter("watchbot_channel_transitions_total", "Kanal durum geçişleri", ("from", "to"))
+
+class ChannelStateTracker:
+    # Kanal başına histerezis: live -> suspect -> offline; suspect'ten tekrar canlı görülürse kapanış olmadan live'a döner
+    def __init__(self, online_confirmations: int, offline_confirmations: int, offline_grace: float, reopen_window: float):
+        self.online_confirmations = max(online_confirmations, 1)
+        self.offline_confirmations = max(offline_confirmations, 1)
+        self.offline_grace = offline_grace
+        self.reopen_window = reopen_window
+        self.channels = {}  # kullanıcı -> {"state", "hits", "misses", "since"}
+        self.closed_at = {}
+        self.stats = {"suspected": 0, "recovered": 0, "went_offline": 0, "unknown_polls": 0, "reopened": 0}
+
+    def state(self, user: str) -> str:
+        entry = self.channels.get(user)
+        return entry["state"] if entry else "offline"
+
+    def _move(self, user: str, entry: dict, state: str):
+        channel_transitions.inc(entry["state"], state)
+        entry["state"] = state
+
+    def observe(self, user: str, seen_live: bool, now: float) -> str:
+        entry = self.channels.setdefault(user, {"state": "offline", "hits": 0, "misses": 0, "since": 0.0})
+        if seen_live:
+            entry["misses"] = 0
+            if entry["state"] == "suspect":
+                self.stats["recovered"] += 1
+                self._move(user, entry, "live")
+                add_log(f"{user} tekrar canlı görüldü, sayfa kapatılmadı", event="recovered", streamer=user)
+            elif entry["state"] == "offline":
+                entry["hits"] += 1
+                if entry["hits"] >= self.online_confirmations:
+                    self._move(user, entry, "live")
+            return entry["state"]
+        
+        entry["hits"] = 0
+        if entry["state"] == "live":
+            entry["misses"] = 1
+            entry["since"] = now
+            self.stats["suspected"] += 1
+            self._move(user, entry, "suspect")
+        elif entry["state"] == "suspect":
+            entry["misses"] += 1
+        if entry["state"] == "suspect" and entry["misses"] >= self.offline_confirmations and now - entry["since"] >= self.offline_grace:
+            self.stats["went_offline"] += 1
+            self._move(user, entry, "offline")
+        return entry["state"]
+
+    def mark_offline(self, user: str):
+        entry = self.channels.get(user)
+        if entry is not None and entry["state"] != "offline":
+            entry["hits"] = entry["misses"] = 0
+            self.stats["went_offline"] += 1
+            self._move(user, entry, "offline")
+
+    def mark_live(self, user: str):
+        entry = self.channels.setdefault(user, {"state": "offline", "hits": 0, "misses": 0, "since": 0.0})
+        entry["hits"] = entry["misses"] = 0
+        if entry["state"] != "live":
+            self._move(user, entry, "live")
+
+    def note_closed(self, user: str, now: float):
+        self.closed_at[user] = now
+
+    def note_launch(self, user: str, now: float):
+        closed = self.closed_at.pop(user, None)
+        if closed is not None and now - closed < self.reopen_window:
+            self.stats["reopened"] += 1
+
+    def forget(self, user: str):
+        self.channels.pop(user, None)
+        self.closed_at.pop(user, None)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"live": 0, "suspect": 0, "offline": 0}
+        for entry in self.channels.values():
+            counts[entry["state"]] += 1
+        return counts
+
+channel_states = ChannelStateTracker(ONLINE_CONFIRMATIONS, OFFLINE_CONFIRMATIONS, OFFLINE_GRACE, REOPEN_WINDOW)
+
+def get_api_rate() -> float:
+    hours = max(time.time() - start_time, 1) / 3600
+    return helix_stats["requests"] / hours
+
+async def fetch_streams_chunk(session: aiohttp.ClientSession, headers: dict, chunk) -> list:
+    params = [("user_login", u) for u in chunk]
+    helix_stats["requests"] += 1
+    try:
+        with helix_latency.time("streams"):
+            async with session.get(TWITCH_STREAMS_URL, headers=headers, params=params) as resp:
+                poll_scheduler.observe_ratelimit(resp.status, resp.headers)
+                if resp.status == 401:
+                    raise HelixUnauthorized(f"Helix 401: {await resp.text()}")
+                resp.raise_for_status()
+                data = await resp.json()
+    except Exception as e:
+        helix_stats["errors"] += 1
+        helix_errors.inc("streams", "401" if isinstance(e, HelixUnauthorized) else error_reason(e))
+        raise
+    return data.get("data", [])
+
+async def query_online_streamers(usernames, token: str) -> Dict[str, dict]:
+    headers = {"Authorization": f"Bearer {token}", "Client-Id": CLIENT_ID or ""}
     online = {}
+    session = await get_http_session()
+    # 100'lük parçalar aynı anda gönderilir, eşzamanlılık bağlantı havuzuyla sınırlı
+    results = await asyncio.gather(*(fetch_streams_chunk(session, headers, chunk) for chunk in chunked(usernames, 100)))
+    for items in results:
+        for item in items:
+            user = item["user_login"].lower()
+            online[user] = item
+    return online
+
+async def get_online_streamers(usernames) -> Optional[Dict[str, dict]]:
+    # None = sonuç bilinmiyor (ağ/API hatası); boş sözlük = hepsi gerçekten çevrimdışı
     try:
-        for chunk in chunked(usernames, 100):
-            params = [("user_login", u) for u in chunk]
-            resp = requests.get(TWITCH_STREAMS_URL, headers=headers, params=params, timeout=10)
-            resp.raise_for_status()
-            for item in resp.json().get("data", []):
-                user = item["user_login"].lower()
-                online[user] = item
-        return online
+        token = await token_manager.get()
+        try:
+            return await query_online_streamers(usernames, token)
+        except HelixUnauthorized:
+            # Token süresinden önce iptal edilmiş olabilir - bir kez yenileyip tekrar dene
+            logger.warning("Helix 401 döndü, token yenilenip tekrar deneniyor")
+            token = await token_manager.refresh(stale_token=token)
+            return await query_online_streamers(usernames, token)
     except Exception as e:
         logger.error(f"Online streamer kontrolü hatası: {e}")
-        return {}
+        return None
+
+def parse_eventsub_timestamp(value: str) -> float:
+    # Twitch nanosaniye hassasiyetinde gönderir; fromisoformat en fazla mikro saniye okur
+    match = re.match(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})$", value.strip())
+    if not match:
+        raise ValueError(f"geçersiz zaman damgası: {value}")
+    fraction = (match.group(2) or ".0")[:7]
+    zone = "+00:00" if match.group(3) == "Z" else match.group(3)
+    return datetime.fromisoformat(match.group(1) + fraction + zone).timestamp()
+
+class EventSubReceiver:
+    # stream.online/offline webhook'ları: imza, tazelik ve tekrar kontrolünden sonra doğrudan açılış/kapanış tetikler
+    SUBSCRIPTION_TYPES = ("stream.online", "stream.offline")
+
+    def __init__(self, secret: str, max_age: float, callback_url: str):
+        self.secret = secret.encode("utf-8") if secret else b""
+        self.max_age = max_age
+        self.callback_url = callback_url
+        self.seen = {}  # mesaj id -> alınma zamanı, ekleme sırasıyla
+        self.last_event = {}  # kullanıcı -> işlenen son olayın zamanı
+        self.subscriptions = {}  # (tip, kullanıcı) -> abonelik id
+        self.stats = {"notifications": 0, "duplicates": 0, "bad_signature": 0, "stale": 0, "out_of_order": 0, "revoked": 0, "subscribed": 0}
+        self._intervals = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret)
+
+    def verify(self, message_id: str, timestamp: str, body: bytes, signature: str) -> bool:
+        expected = "sha256=" + hmac.new(self.secret, message_id.encode("utf-8") + timestamp.encode("utf-8") + body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def is_duplicate(self, message_id: str, now: float) -> bool:
+        # Tazelik sınırından eski mesajlar zaten reddedildiği için id'ler o kadar tutulur
+        for old_id, received in list(islice(self.seen.items(), 100)):
+            if now - received < self.max_age * 2:
+                break
+            del self.seen[old_id]
+        if message_id in self.seen:
+            return True
+        self.seen[message_id] = now
+        return False
+
+    async def handle(self, request) -> web.Response:
+        body = await request.read()
+        headers = request.headers
+        message_id = headers.get("Twitch-Eventsub-Message-Id", "")
+        timestamp = headers.get("Twitch-Eventsub-Message-Timestamp", "")
+        if not message_id or not self.verify(message_id, timestamp, body, headers.get("Twitch-Eventsub-Message-Signature", "")):
+            self.stats["bad_signature"] += 1
+            logger.warning(f"EventSub: imza doğrulanamadı ({request.remote})")
+            return web.Response(status=403)
+        now = time.time()
+        try:
+            sent_at = parse_eventsub_timestamp(timestamp)
+        except ValueError:
+            sent_at = 0.0
+        if abs(now - sent_at) > self.max_age:
+            self.stats["stale"] += 1
+            logger.warning(f"EventSub: eski mesaj reddedildi ({message_id})")
+            return web.Response(status=403)
+        if self.is_duplicate(message_id, now):
+            # Twitch cevap alamadığında aynı mesajı tekrar yollar; 2xx dönülmezse denemeye devam eder
+            self.stats["duplicates"] += 1
+            return web.Response(status=204)
+        
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return web.Response(status=400)
+        subscription = payload.get("subscription", {})
+        message_type = headers.get("Twitch-Eventsub-Message-Type", "")
+        if message_type == "webhook_callback_verification":
+            logger.info(f"EventSub: {subscription.get('type')} aboneliği doğrulandı")
+            return web.Response(text=payload.get("challenge", ""), content_type="text/plain")
+        if message_type == "revocation":
+            self.on_revocation(subscription)
+            return web.Response(status=204)
+        if message_type == "notification":
+            self.stats["notifications"] += 1
+            # Twitch birkaç saniye içinde cevap bekler; açılış/kapanış arka planda sürer
+            spawn(self.on_notification(subscription.get("type", ""), payload.get("event", {}), sent_at))
+            return web.Response(status=204)
+        return web.Response(status=400)
+
+    async def on_notification(self, sub_type: str, event: dict, sent_at: float):
+        user = event.get("broadcaster_user_login", "").lower()
+        if user not in streamer_meta:
+            return
+        if sent_at < self.last_event.get(user, 0.0):
+            self.stats["out_of_order"] += 1
+            return
+        self.last_event[user] = sent_at
+        try:
+            if sub_type == "stream.online":
+                channel_states.mark_live(user)
+                item = {
+                    "user_login": user,
+                    "user_name": event.get("broadcaster_user_name", user),
+                    "type": event.get("type", "live"),
+                    "started_at": event.get("started_at"),
+                }
+                add_log(f"{user} canlı yayına başladı (EventSub)", event="eventsub", streamer=user)
+                await apply_online_result({user: item}, [user])
+            elif sub_type == "stream.offline":
+                channel_states.mark_offline(user)
+                add_log(f"{user} yayını bitti (EventSub)", event="eventsub", streamer=user)
+                await apply_online_result({}, [user])
+        except Exception as e:
+            logger.error(f"EventSub olayı işlenemedi - {user}: {e}")
+
+    def on_revocation(self, subscription: dict):
+        self.stats["revoked"] += 1
+        condition = subscription.get("condition", {})
+        for key, sub_id in list(self.subscriptions.items()):
+            if sub_id == subscription.get("id"):
+                del self.subscriptions[key]
+        add_log(f"EventSub aboneliği iptal edildi: {subscription.get('type')} ({subscription.get('status')}, {condition.get('broadcaster_user_id')})", level="warning", event="eventsub")
+        # Push kaybedildi: hızlı sorguya geri dön ve kaçırılan değişiklikleri hemen topla
+        self.fallback()
+
+    @property
+    def push_active(self) -> bool:
+        return self._intervals is not None
+
+    def activate(self):
+        if self._intervals is None:
+            self._intervals = (poll_scheduler.discovery_interval, poll_scheduler.confirm_interval)
+        poll_scheduler.discovery_interval = EVENTSUB_RECONCILE_INTERVAL
+        poll_scheduler.confirm_interval = EVENTSUB_RECONCILE_INTERVAL
+        logger.info(f"EventSub push modu: sorgu {EVENTSUB_RECONCILE_INTERVAL:.0f}sn'lik uzlaştırma turuna indi")
+
+    def fallback(self):
+        if self._intervals is not None:
+            poll_scheduler.discovery_interval, poll_scheduler.confirm_interval = self._intervals
+            self._intervals = None
+            poll_scheduler.trigger_discovery()
+
+    async def _helix(self, method: str, url: str, **kwargs):
+        token = await token_manager.get()
+        headers = {"Authorization": f"Bearer {token}", "Client-Id": CLIENT_ID or ""}
+        session = await get_http_session()
+        helix_stats["requests"] += 1
+        with helix_latency.time("eventsub"):
+            async with session.request(method, url, headers=headers, **kwargs) as resp:
+                poll_scheduler.observe_ratelimit(resp.status, resp.headers)
+                if resp.status == 409:
+                    return None
+                resp.raise_for_status()
+                return await resp.json() if resp.status != 204 else None
+
+    async def resolve_user_ids(self, logins) -> Dict[str, str]:
+        ids = {}
+        for chunk in chunked(list(logins), 100):
+            data = await self._helix("GET", TWITCH_USERS_URL, params=[("login", u) for u in chunk])
+            for item in (data or {}).get("data", []):
+                ids[item["login"].lower()] = item["id"]
+        return ids
+
+    async def list_subscriptions(self) -> Dict[Tuple[str, str], str]:
+        existing = {}
+        cursor = None
+        while True:
+            params = [("after", cursor)] if cursor else []
+            data = await self._helix("GET", TWITCH_EVENTSUB_URL, params=params) or {}
+            for sub in data.get("data", []):
+                if sub.get("transport", {}).get("callback") == self.callback_url and sub.get("status") in ("enabled", "webhook_callback_verification_pending"):
+                    existing[(sub["type"], sub["condition"].get("broadcaster_user_id"))] = sub["id"]
+            cursor = data.get("pagination", {}).get("cursor")
+            if not cursor:
+                return existing
+
+    async def sync_subscriptions(self, logins) -> bool:
+        # EVENTSUB_CALLBACK_URL verilmişse eksik abonelikler oluşturulur; yoksa aboneliklerin dışarıda yönetildiği varsayılır
+        if not self.callback_url or not logins:
+            return True
+        try:
+            ids = await self.resolve_user_ids(logins)
+            existing = await self.list_subscriptions()
+            created = 0
+            for user, user_id in ids.items():
+                for sub_type in self.SUBSCRIPTION_TYPES:
+                    sub_id = existing.get((sub_type, user_id))
+                    if sub_id is None:
+                        data = await self._helix("POST", TWITCH_EVENTSUB_URL, json={
+                            "type": sub_type,
+                            "version": "1",
+                            "condition": {"broadcaster_user_id": user_id},
+                            "transport": {"method": "webhook", "callback": self.callback_url, "secret": self.secret.decode("utf-8")},
+                        })
+                        if data and data.get("data"):
+                            sub_id = data["data"][0]["id"]
+                            created += 1
+                    if sub_id:
+                        self.subscriptions[(sub_type, user)] = sub_id
+            self.stats["subscribed"] = len(self.subscriptions)
+            missing = [u for u in logins if u not in ids]
+            add_log(f"EventSub: {created} yeni abonelik, toplam {len(self.subscriptions)}" + (f", bulunamayan {len(missing)} kanal" if missing else ""), event="eventsub")
+            return True
+        except Exception as e:
+            add_log(f"EventSub abonelik hatası: {str(e)}", level="error", event="eventsub")
+            logger.error(f"EventSub abonelik hatası: {e}")
+            # Push gelmeyecek kanallar var; normal sorgu aralıklarına dönülür
+            self.fallback()
+            return False
+
+    async def start(self, logins):
+        # Sorgu, abonelikler kurulmadan seyrekleşmez
+        if await self.sync_subscriptions(logins):
+            self.activate()
+
+    async def unsubscribe(self, logins):
+        for user in logins:
+            for sub_type in self.SUBSCRIPTION_TYPES:
+                sub_id = self.subscriptions.pop((sub_type, user), None)
+                if sub_id is None:
+                    continue
+                try:
+                    await self._helix("DELETE", TWITCH_EVENTSUB_URL, params={"id": sub_id})
+                except Exception as e:
+                    logger.warning(f"EventSub aboneliği silinemedi - {user}: {e}")
+        self.stats["subscribed"] = len(self.subscriptions)
+
+eventsub = EventSubReceiver(EVENTSUB_SECRET, EVENTSUB_MAX_AGE, EVENTSUB_CALLBACK_URL)
 
 async def init_playwright():
     global playwright, browser
@@ -163,7 +1547,8 @@ async def init_playwright():
                 "--disable-background-timer-throttling",
                 "--disable-backgrounding-occluded-windows",
                 "--disable-renderer-backgrounding",
-                "--autoplay-policy=no-user-gesture-required"
+                "--autoplay-policy=no-user-gesture-required",
+                "--enable-precise-memory-info"
             ]
         )
         logger.info("Playwright başarıyla başlatıldı")
@@ -172,203 +1557,1343 @@ async def init_playwright():
         logger.error(f"Playwright başlatma hatası: {e}")
         return False
 
-async def start_watching(user: str):
-    try:
-        if not browser:
-            logger.error("Browser başlatılmamış")
-            return False
+WATCH_INIT_SCRIPT = """
+(() => {
+    // Video ve audio elementlerini tamamen engelle
+    const originalCreateElement = document.createElement.bind(document);
+    document.createElement = function(tagName) {
+        const element = originalCreateElement(tagName);
+        if (tagName.toLowerCase() === 'video' || tagName.toLowerCase() === 'audio') {
+            // Video/Audio elementini oluştur ama hiçbir şey yükleme
+            element.play = () => Promise.resolve();
+            element.pause = () => {};
+            element.load = () => {};
+            Object.defineProperty(element, 'src', {
+                set: () => {},
+                get: () => ''
+            });
+            Object.defineProperty(element, 'currentTime', {
+                set: () => {},
+                get: () => 0
+            });
+            Object.defineProperty(element, 'volume', {
+                set: () => {},
+                get: () => 0
+            });
+            Object.defineProperty(element, 'muted', {
+                set: () => {},
+                get: () => true
+            });
+        }
+        return element;
+    };
+    
+    // MediaSource'u engelle
+    window.MediaSource = class {
+        constructor() { throw new Error('Blocked'); }
+    };
+    
+    // Audio Context'i engelle
+    window.AudioContext = class { constructor() { throw new Error('Blocked'); } };
+    window.webkitAudioContext = class { constructor() { throw new Error('Blocked'); } };
+    
+    const START_LABEL = 'div[data-a-target="tw-core-button-label-text"]';
+    const START_TEXTS = ['izlemeye başla', 'start watching'];
+    const PLAYER = '[data-a-target="video-player"]';
+    
+    let resolveReady;
+    window.__watchbotReady = new Promise(resolve => { resolveReady = resolve; });
+    const signal = (kind) => {
+        if (window.__watchbotSignal) {
+            // performance.now(): navigasyon başlangıcından bu yana geçen ms
+            window.__watchbotSignal(kind, performance.now()).catch(() => {});
+        }
+    };
+    const silence = (e) => {
+        try { e.pause(); } catch (_) {}
+        e.muted = true;
+        e.volume = 0;
+        e.removeAttribute('src');
+    };
+    const each = (root, selector, fn) => {
+        if (root.matches(selector)) fn(root);
+        root.querySelectorAll(selector).forEach(fn);
+    };
+    
+    // setInterval yerine sadece DOM'a yeni eklenen düğümlere bakılır
+    const scan = (root) => {
+        if (root.nodeType !== 1) return;
+        each(root, 'video, audio', silence);
+        each(root, PLAYER, player => {
+            player.style.pointerEvents = 'none';
+            resolveReady('player');
+        });
+        each(root, START_LABEL, label => {
+            if (label.dataset.watchbotClicked) return;
+            const text = label.textContent.trim().toLocaleLowerCase('tr');
+            if (START_TEXTS.some(t => text.includes(t))) {
+                label.dataset.watchbotClicked = '1';
+                label.click();
+                signal('start-clicked');
+            }
+        });
+    };
+    new MutationObserver(records => {
+        for (const record of records) {
+            record.addedNodes.forEach(scan);
+        }
+    }).observe(document, { childList: true, subtree: true });
+    if (document.documentElement) scan(document.documentElement);
+})();
+"""
 
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 400, "height": 300},
-            ignore_https_errors=True
-        )
-        
-        cookies_to_add = []
-        if AUTH_TOKEN:
-            cookies_to_add.append({
-                "name": "auth-token",
-                "value": AUTH_TOKEN,
-                "domain": ".twitch.tv",
-                "path": "/",
-                "secure": True
-            })
-        if LOGIN_TOKEN:
-            cookies_to_add.append({
-                "name": "login", 
-                "value": LOGIN_TOKEN,
-                "domain": ".twitch.tv",
-                "path": "/",
-                "secure": True
-            })
-        if PERSISTENT_TOKEN:
-            cookies_to_add.append({
-                "name": "persistent",
-                "value": PERSISTENT_TOKEN, 
+# Playwright route'ları WebSocket'leri yakalayamaz; sohbet bağlantısı sayfa içinde kesilir
+CHAT_BLOCK_SCRIPT = """
+    const OriginalWebSocket = window.WebSocket;
+    window.WebSocket = function(url, protocols) {
+        if (String(url).includes('irc-ws.chat.twitch.tv')) {
+            throw new Error('Blocked');
+        }
+        return new OriginalWebSocket(url, protocols);
+    };
+    window.WebSocket.prototype = OriginalWebSocket.prototype;
+    Object.assign(window.WebSocket, OriginalWebSocket);
+"""
+
+def build_auth_cookies() -> list:
+    cookies = []
+    for name, value in [
+        ("auth-token", AUTH_TOKEN),
+        ("login", LOGIN_TOKEN),
+        ("persistent", PERSISTENT_TOKEN),
+        ("twilight-user", TWILIGHT_USER),
+    ]:
+        if value:
+            cookies.append({
+                "name": name,
+                "value": value,
                 "domain": ".twitch.tv",
                 "path": "/",
                 "secure": True
             })
-        if TWILIGHT_USER:
-            cookies_to_add.append({
-                "name": "twilight-user",
-                "value": TWILIGHT_USER,
-                "domain": ".twitch.tv", 
-                "path": "/",
-                "secure": True
-            })
-        
+    return cookies
+
+# Engellenen isteğin indirilseydi tutacağı tahmini boyut (bayt)
+ESTIMATED_BYTES = {"media": 1_000_000, "image": 30_000, "font": 40_000, "script": 80_000, "stylesheet": 30_000}
+SEGMENT_BYTES = 1_000_000
+DEFAULT_BLOCKED_BYTES = 5_000
+
+class RequestFilter:
+    def __init__(self, resource_types, url_patterns, hosts):
+        self.resource_types = frozenset(resource_types)
+        # Tüm desenler tek bir regex'e derlenir, istek başına tek arama yapılır
+        self.url_regex = re.compile("|".join(f"(?:{p})" for p in url_patterns)) if url_patterns else None
+        self.hosts = frozenset(h.lower().lstrip(".") for h in hosts)
+
+    def host_blocked(self, host: str) -> bool:
+        # Son ek eşleşmesi: ads.x.doubleclick.net -> x.doubleclick.net -> doubleclick.net
+        while host:
+            if host in self.hosts:
+                return True
+            dot = host.find(".")
+            if dot < 0:
+                return False
+            host = host[dot + 1:]
+        return False
+
+    def match(self, resource_type: str, url: str) -> Optional[str]:
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.hosts and self.host_blocked((urlsplit(url).hostname or "").lower()):
+            return "host"
+        if self.url_regex is not None and self.url_regex.search(url):
+            return "url"
+        return None
+
+def build_request_filter() -> RequestFilter:
+    profile = BLOCK_PROFILES.get(BLOCK_PROFILE)
+    if profile is None:
+        logger.warning(f"Bilinmeyen engelleme profili '{BLOCK_PROFILE}', default kullanılıyor")
+        profile = BLOCK_PROFILES["default"]
+    return RequestFilter(
+        profile["resource_types"] + BLOCK_RESOURCE_TYPES,
+        profile["url_patterns"] + BLOCK_URL_PATTERNS,
+        profile["hosts"] + BLOCK_HOSTS,
+    )
+
+request_filter = build_request_filter()
+
+def get_block_stats(user: str) -> dict:
+    stats = block_stats.get(user)
+    if stats is None:
+        stats = block_stats[user] = {"blocked": 0, "allowed": 0, "bytes_saved": 0}
+    return stats
+
+async def route_request(route):
+    request = route.request
+    reason = request_filter.match(request.resource_type, request.url)
+    try:
+        user = page_owners.get(request.frame.page)
+    except Exception:
+        # Service worker istekleri bir frame'e bağlı değil
+        user = None
+    stats = get_block_stats(user) if user else block_totals
+    if reason is None:
+        stats["allowed"] += 1
+        await route.continue_()
+        return
+    stats["blocked"] += 1
+    if reason == "url":
+        stats["bytes_saved"] += SEGMENT_BYTES
+    else:
+        stats["bytes_saved"] += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_BLOCKED_BYTES)
+    await route.abort("blockedbyclient")
+
+async def new_auth_context() -> BrowserContext:
+    context = await browser.new_context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        viewport={"width": 400, "height": 300},
+        ignore_https_errors=True
+    )
+    try:
+        cookies_to_add = build_auth_cookies()
         if cookies_to_add:
-            await context.add_cookies(cookies_to_add)
-        
-        page = await context.new_page()
+            with start_phase_seconds.time("cookies"):
+                await context.add_cookies(cookies_to_add)
         
-        # KRITIK: Video/Audio'yu tamamen engelle - kaynak tüketimini minimize et
-        await page.route("**/*.m3u8", lambda route: route.abort())
-        await page.route("**/*.ts", lambda route: route.abort())
-        await page.route("**/*.mp4", lambda route: route.abort())
-        await page.route("**/*.webm", lambda route: route.abort())
-        
-        # Video elementlerini devre dışı bırak
-        await page.add_init_script("""
-            // Video ve audio elementlerini tamamen engelle
-            const originalCreateElement = document.createElement.bind(document);
-            document.createElement = function(tagName) {
-                const element = originalCreateElement(tagName);
-                if (tagName.toLowerCase() === 'video' || tagName.toLowerCase() === 'audio') {
-                    // Video/Audio elementini oluştur ama hiçbir şey yükleme
-                    element.play = () => Promise.resolve();
-                    element.pause = () => {};
-                    element.load = () => {};
-                    Object.defineProperty(element, 'src', {
-                        set: () => {},
-                        get: () => ''
-                    });
-                    Object.defineProperty(element, 'currentTime', {
-                        set: () => {},
-                        get: () => 0
-                    });
-                    Object.defineProperty(element, 'volume', {
-                        set: () => {},
-                        get: () => 0
-                    });
-                    Object.defineProperty(element, 'muted', {
-                        set: () => {},
-                        get: () => true
-                    });
-                }
-                return element;
-            };
-            
-            // MediaSource'u engelle
-            window.MediaSource = class {
-                constructor() { throw new Error('Blocked'); }
-            };
-            
-            // Audio Context'i engelle
-            window.AudioContext = class { constructor() { throw new Error('Blocked'); } };
-            window.webkitAudioContext = class { constructor() { throw new Error('Blocked'); } };
-            
-            // Her 2 saniyede bir kontrol et
-            setInterval(() => {
-                document.querySelectorAll('video, audio').forEach(e => {
-                    e.pause();
-                    e.src = '';
-                    e.load = () => {};
-                    e.muted = true;
-                    e.volume = 0;
-                });
-            }, 2000);
-        """)
+        # KRITIK: Video/Audio'yu tamamen engelle - kaynak tüketimini minimize et.
+        # Tek bir context seviyesinde handler, tüm sekmelerin isteklerini engelleme listesine göre süzer.
+        await context.route("**/*", route_request)
         
+        # Video elementlerini devre dışı bırak, sayfa hazır olunca sinyal ver
+        await context.expose_binding("__watchbotSignal", on_page_signal)
+        await context.add_init_script(WATCH_INIT_SCRIPT)
+        if BLOCK_PROFILES.get(BLOCK_PROFILE, {}).get("block_chat"):
+            await context.add_init_script(CHAT_BLOCK_SCRIPT)
+    except BaseException:
+        await context.close()
+        raise
+    return context
+
+async def get_shared_context() -> BrowserContext:
+    for context in shared_contexts:
+        if CONTEXT_SHARD_SIZE <= 0 or len(context.pages) < CONTEXT_SHARD_SIZE:
+            return context
+    context = await new_auth_context()
+    shared_contexts.append(context)
+    logger.info(f"Yeni paylaşımlı context açıldı ({len(shared_contexts)} shard)")
+    return context
+
+async def create_watch_context() -> Tuple[BrowserContext, Page]:
+    if SHARED_CONTEXT:
+        # Shard seçimi ile sekme açılışı arasında başka bir açılış araya girip limiti aşmasın
+        async with shared_context_lock:
+            context = await get_shared_context()
+            page = await context.new_page()
+    else:
+        context = await new_auth_context()
         try:
-            await page.goto(f"https://www.twitch.tv/{user}", wait_until="domcontentloaded", timeout=15000)
-        except:
+            page = await context.new_page()
+        except BaseException:
+            await context.close()
+            raise
+    return context, page
+
+async def close_watch_page(context: BrowserContext, page: Page):
+    try:
+        await page.close()
+    except Exception:
+        pass
+    if context in shared_contexts:
+        # Boşalan fazladan shard'ları kapat, ilk context sıcak kalsın
+        if not context.pages and len(shared_contexts) > 1:
+            shared_contexts.remove(context)
             try:
-                await page.goto(f"https://www.twitch.tv/{user}", timeout=10000)
-            except:
+                await context.close()
+            except Exception:
                 pass
-        
-        await asyncio.sleep(2)
-        # "İzlemeye Başla" butonuna otomatik tıkla
-                # "İzlemeye Başla" butonuna otomatik tıkla
+        return
+    try:
+        await context.close()
+    except Exception:
+        pass
+
+class ContextPool:
+    def __init__(self, size: int, idle_ttl: float, health_timeout: float):
+        self.size = size
+        self.idle_ttl = idle_ttl
+        self.health_timeout = health_timeout
+        self.idle = []  # (context, page, boşa çıktığı zaman)
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0, "unhealthy": 0}
+        self._task = None
+        self._warm_task = None
+
+    async def is_healthy(self, page: Page) -> bool:
+        if page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(page.evaluate("1"), timeout=self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self) -> Tuple[BrowserContext, Page]:
+        while self.idle:
+            context, page, _ = self.idle.pop()
+            if await self.is_healthy(page):
+                self.stats["hits"] += 1
+                self._schedule_warm()
+                return context, page
+            self.stats["unhealthy"] += 1
+            await self.discard(context, page)
+        self.stats["misses"] += 1
+        return await create_watch_context()
+
+    async def release(self, context: BrowserContext, page: Page):
+        if len(self.idle) >= self.size or not browser or page.is_closed():
+            await self.discard(context, page)
+            return
+        try:
+            # Önceki kanalı durdur; cookie, route ve init script yerinde kalır
+            await page.goto("about:blank", timeout=5000)
+        except Exception:
+            await self.discard(context, page)
+            return
+        self.idle.append((context, page, time.time()))
+
+    async def discard(self, context: BrowserContext, page: Page):
+        await close_watch_page(context, page)
+
+    async def warm(self):
+        while browser and len(self.idle) < self.size:
+            try:
+                context, page = await create_watch_context()
+            except Exception as e:
+                logger.warning(f"Havuz için context hazırlanamadı: {e}")
+                return
+            self.idle.append((context, page, time.time()))
+
+    def _schedule_warm(self):
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.create_task(self.warm())
+
+    async def evict_idle(self):
+        now = time.time()
+        # Liste await'lerden önce bölünür; arada acquire/release yapılan girdiler kaybolmaz
+        expired = [entry for entry in self.idle if now - entry[2] > self.idle_ttl]
+        self.idle = [entry for entry in self.idle if now - entry[2] <= self.idle_ttl]
+        for context, page, _ in expired:
+            self.stats["evicted"] += 1
+            await self.discard(context, page)
+
+    async def _maintain_loop(self):
+        while True:
+            await asyncio.sleep(min(self.idle_ttl, 60))
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning(f"Havuz temizleme hatası: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._maintain_loop())
+
+    async def close(self):
+        for task in (self._task, self._warm_task):
+            if task and not task.done():
+                task.cancel()
+        self._task = None
+        self._warm_task = None
+        idle, self.idle = self.idle, []
+        await asyncio.gather(*(self.discard(context, page) for context, page, _ in idle), return_exceptions=True)
+
+context_pool = ContextPool(POOL_SIZE, POOL_IDLE_TTL, POOL_HEALTH_TIMEOUT)
+
+async def prepare_watch_page(user: str, page: Page):
+    # Sabit beklemeler yok: init script oynatıcı DOM'a girince hazır sinyali verir,
+    # "İzlemeye Başla" kapısını da görür görmez kendisi tıklar
+    try:
+        with start_phase_seconds.time("goto"):
+            await page.goto(TWITCH_CHANNEL_URL.format(login=user), wait_until="commit", timeout=NAV_TIMEOUT * 1000)
+    except Exception as e:
+        logger.warning(f"{user} sayfası yüklenemedi: {e}")
+        return
+    
+    waited = time.perf_counter()
+    deadline = time.time() + READY_TIMEOUT
+    while True:
+        try:
+            await asyncio.wait_for(page.evaluate("() => window.__watchbotReady"), timeout=max(deadline - time.time(), 0.1))
+            start_phase_seconds.observe(time.perf_counter() - waited, "ready")
+            return
+        except asyncio.TimeoutError:
+            logger.warning(f"{user} yayını {READY_TIMEOUT:.0f}sn içinde hazır sinyali vermedi")
+            return
+        except Exception as e:
+            # Yönlendirme sırasında execution context yenilenebilir; yeni dokümanda tekrar bekle
+            if time.time() >= deadline or page.is_closed():
+                logger.warning(f"{user} yayını hazır beklenirken hata: {e}")
+                return
+            await asyncio.sleep(0.2)
+
+def on_page_signal(source, kind: str, elapsed_ms: Optional[float] = None):
+    user = page_owners.get(source.get("page"), "?")
+    if kind == "start-clicked":
+        if elapsed_ms is not None:
+            start_phase_seconds.observe(elapsed_ms / 1000, "click")
+        logger.info(f"{user} yayını için 'İzlemeye Başla' butonuna otomatik basıldı")
+
+throttle_transitions = Counter("watchbot_throttle_transitions_total", "Sayfa dondurma/çözme geçişleri", ("state",))
+
+class PageThrottler:
+    def __init__(self, policy: str, default: str):
+        self.rules = self.parse_policy(policy)
+        if default not in THROTTLE_PROFILES:
+            logger.warning(f"Bilinmeyen kısma profili '{default}', none kullanılıyor")
+            default = "none"
+        self.default = default
+        self.sessions = {}  # kullanıcı -> {"session", "profile", "frozen", "next"}
+        self.remote = {}  # supervisor modunda worker'ların raporladığı kullanıcı -> (profil, donmuş mu)
+        self.stats = {"applied": 0, "failed": 0, "freezes": 0, "thaws": 0}
+        self._task = None
+
+    @staticmethod
+    def parse_policy(policy: str) -> list:
+        rules = []
+        for item in policy.split(","):
+            if not item.strip():
+                continue
+            threshold, _, name = item.partition(":")
+            name = name.strip().lower()
+            try:
+                threshold = int(threshold)
+            except ValueError:
+                logger.warning(f"Geçersiz kısma kuralı '{item.strip()}', atlanıyor")
+                continue
+            if name not in THROTTLE_PROFILES:
+                logger.warning(f"Bilinmeyen kısma profili '{name}', atlanıyor")
+                continue
+            rules.append((threshold, name))
+        return sorted(rules, reverse=True)
+
+    def profile_for(self, user: str) -> str:
+        priority = get_streamer_priority(user)
+        for threshold, name in self.rules:
+            if priority >= threshold:
+                return name
+        return self.default
+
+    def profile(self, user: str) -> str:
+        state = self.sessions.get(user)
+        return state["profile"] if state else self.remote.get(user, ("none", False))[0]
+
+    def is_frozen(self, user: str) -> bool:
+        state = self.sessions.get(user)
+        return state["frozen"] if state else self.remote.get(user, ("none", False))[1]
+
+    def export(self) -> Dict[str, list]:
+        return {user: [state["profile"], state["frozen"]] for user, state in self.sessions.items()}
+
+    def counts(self) -> Dict[str, int]:
+        counts = {name: 0 for name in THROTTLE_PROFILES}
+        for user in pages:
+            counts[self.profile(user)] += 1
+        return counts
+
+    @staticmethod
+    async def _configure(session, profile: dict):
+        await session.send("Emulation.setCPUThrottlingRate", {"rate": profile["cpu_rate"]})
+        features = [{"name": "prefers-reduced-motion", "value": "reduce"}] if profile["reduced_motion"] else []
+        await session.send("Emulation.setEmulatedMedia", {"features": features})
+
+    async def apply(self, user: str, context: BrowserContext, page: Page):
+        name = self.profile_for(user)
+        state = self.sessions.get(user)
+        if state is None:
+            # Kısıtlanmayan sayfa için CDP oturumu hiç açılmaz
+            if name == "none":
+                return
+            try:
+                session = await context.new_cdp_session(page)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"{user} için CDP oturumu açılamadı: {e}")
+                return
+            state = self.sessions[user] = {"session": session, "profile": "none", "frozen": False, "next": None}
+        if state["profile"] == name:
+            return
+        profile = THROTTLE_PROFILES[name]
+        try:
+            if state["frozen"]:
+                await state["session"].send("Page.setWebLifecycleState", {"state": "active"})
+                state["frozen"] = False
+            await self._configure(state["session"], profile)
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.warning(f"{user} kısma profili uygulanamadı ({name}): {e}")
+            return
+        state["profile"] = name
+        # Aynı anda açılan sayfalar aynı anda donup çözülmesin
+        state["next"] = time.time() + profile["thaw"] + random.uniform(0, profile["freeze"]) if profile["freeze"] > 0 else None
+        self.stats["applied"] += 1
+        logger.info(f"{user} sayfasına '{name}' kısma profili uygulandı")
+
+    async def retune(self, user: str):
+        # Öncelik değişince politika yeniden seçilir
+        if user in pages and user in contexts:
+            await self.apply(user, contexts[user], pages[user])
+
+    async def release(self, user: str):
+        # Sayfa havuza dönmeden kısıtlamalar kaldırılır; sonraki kanal kendi profilini alır.
+        # Yolda olan bir dondurma komutu varsa bu oturumdaki "active" ondan sonra işlenir.
+        state = self.sessions.pop(user, None)
+        if state is None:
+            return
+        session = state["session"]
+
+        async def reset():
+            if state["frozen"] or THROTTLE_PROFILES[state["profile"]]["freeze"] > 0:
+                await session.send("Page.setWebLifecycleState", {"state": "active"})
+            await self._configure(session, THROTTLE_PROFILES["none"])
+            await session.detach()
+        try:
+            await asyncio.wait_for(reset(), timeout=5)
+        except Exception:
+            pass
+
+    def forget(self, user: str):
+        # Kapatılacak sayfa için kısıtlamaları geri almaya gerek yok
+        self.sessions.pop(user, None)
+
+    async def _cycle(self, user: str, state: dict):
+        if self.sessions.get(user) is not state:
+            return
+        frozen = not state["frozen"]
+        profile = THROTTLE_PROFILES[state["profile"]]
         try:
-            await page.wait_for_selector('div[data-a-target="tw-core-button-label-text"]', timeout=5000)
-            buttons = await page.query_selector_all('div[data-a-target="tw-core-button-label-text"]')
-            for b in buttons:
-                text = (await b.inner_text()).strip().lower()
-                if "izlemeye başla" in text:
-                    await b.click()
-                    logger.info(f"{user} yayını için 'İzlemeye Başla' butonuna otomatik basıldı")
-                    break
+            await asyncio.wait_for(
+                state["session"].send("Page.setWebLifecycleState", {"state": "frozen" if frozen else "active"}),
+                timeout=5,
+            )
         except Exception as e:
-            logger.warning(f"{user} yayını için 'İzlemeye Başla' butonu bulunamadı veya tıklanamadı: {e}")
+            logger.debug(f"{user} yaşam döngüsü değiştirilemedi: {e}")
+            return
+        state["frozen"] = frozen
+        state["next"] = time.time() + (profile["freeze"] if frozen else profile["thaw"])
+        self.stats["freezes" if frozen else "thaws"] += 1
+        throttle_transitions.inc("frozen" if frozen else "active")
 
-	
-        # Sayfayı minimum kaynak kullanacak şekilde ayarla
-        try:
-            await page.evaluate("""
-                // Tüm video ve audio elementlerini tamamen durdur
-                document.querySelectorAll('video, audio').forEach(e => {
-                    e.pause();
-                    e.src = '';
-                    e.srcObject = null;
-                    e.muted = true;
-                    e.volume = 0;
-                    e.removeAttribute('src');
-                });
-                
-                // Player'ı kontrol et ve durdur
-                const player = document.querySelector('[data-a-target="video-player"]');
-                if (player) {
-                    player.style.pointerEvents = 'none';
-                }
-            """)
-        except:
-            pass
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(1)
+            now = time.time()
+            due = [(u, s) for u, s in self.sessions.items() if s["next"] is not None and now >= s["next"]]
+            if due:
+                await asyncio.gather(*(self._cycle(u, s) for u, s in due), return_exceptions=True)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+page_throttler = PageThrottler(THROTTLE_POLICY, THROTTLE_DEFAULT)
+
+async def discard_launch(user: str, context: Optional[BrowserContext], page: Optional[Page]):
+    # Yarıda kalan açılışın sayfası havuza dönmez, kapatılır
+    block_stats.pop(user, None)
+    page_throttler.forget(user)
+    if page is None:
+        return
+    page_owners.pop(page, None)
+    await context_pool.discard(context, page)
+
+async def start_watching(user: str):
+    context = page = None
+    try:
+        if not browser:
+            logger.error("Browser başlatılmamış")
+            return False
+
+        with start_phase_seconds.time("context"):
+            context, page = await context_pool.acquire()
+        page_owners[page] = user
+        block_stats[user] = {"blocked": 0, "allowed": 0, "bytes_saved": 0}
+        
+        await prepare_watch_page(user, page)
+        await page_throttler.apply(user, context, page)
         
         contexts[user] = context
         pages[user] = page
         watch_times[user] = time.time()
+        dashboard.mark_dirty()
         
-        cookies_added = len(cookies_to_add)
-        log_message = f"[+] {user} yayını açıldı (NO STREAM - kaynak tasarrufu) - {cookies_added} cookie eklendi"
-        logs.append(f"[{time.strftime('%H:%M:%S')}] {log_message}")
+        cookies_added = len(build_auth_cookies())
+        add_log(f"[+] {user} yayını açıldı (NO STREAM - kaynak tasarrufu) - {cookies_added} cookie eklendi", event="start", streamer=user)
         logger.info(f"Playwright başlatıldı - {user} - {cookies_added} cookie - NO STREAM MODE")
+        start_results.inc("ok")
         
         return True
-        
+    
+    except asyncio.CancelledError:
+        start_results.inc("cancelled")
+        await discard_launch(user, context, page)
+        raise
     except Exception as e:
+        start_results.inc("failed")
         logger.error(f"Playwright başlatma hatası - {user}: {e}")
-        log_message = f"[-] {user} yayını açılamadı: {str(e)}"
-        logs.append(f"[{time.strftime('%H:%M:%S')}] {log_message}")
+        add_log(f"[-] {user} yayını açılamadı: {str(e)}", level="error", event="start_failed", streamer=user)
+        await discard_launch(user, context, page)
         return False
 
-async def stop_watching(user: str):
-    try:
-        if user in pages:
+class StreamLauncher:
+    def __init__(self, concurrency: int, timeout: float):
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.queue = asyncio.Queue()
+        self.pending = set()  # kuyrukta bekleyen ya da açılmakta olan kanallar
+        self.queued = set()  # kuyrukta girdisi olan kanallar; iptal edilen girdi de sırası gelene kadar durur
+        self.launching = set()
+        self.in_flight = 0
+        self.latencies = deque(maxlen=500)
+        self.stats = {"launched": 0, "failed": 0, "timeouts": 0, "skipped": 0}
+        self._workers = []
+
+    def submit(self, user: str) -> bool:
+        if user in self.pending or user in pages:
+            return False
+        self.pending.add(user)
+        # İptal edilip yeniden gönderilen kanalın eski girdisi hâlâ kuyruktaysa o kullanılır
+        if user not in self.queued and user not in self.launching:
+            self.queued.add(user)
+            self.queue.put_nowait(user)
+        return True
+
+    def cancel(self, user: str):
+        # Kuyruktaki kanal artık açılmayacak; worker sırası gelince atlar
+        self.pending.discard(user)
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def percentiles(self) -> Dict[str, float]:
+        if not self.latencies:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        ordered = sorted(self.latencies)
+        last = len(ordered) - 1
+        return {f"p{p}": ordered[min(last, int(last * p / 100 + 0.5))] for p in (50, 95, 99)}
+
+    async def _launch(self, user: str):
+        self.in_flight += 1
+        started = time.time()
+        try:
+            ok = await asyncio.wait_for(open_stream(user), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            ok = False
+            self.stats["timeouts"] += 1
+            add_log(f"{user} açılışı zaman aşımına uğradı ({self.timeout:.0f}s)", level="warning", event="start_timeout", streamer=user)
+            logger.warning(f"{user} açılışı zaman aşımına uğradı ({self.timeout:.0f}s)")
+        finally:
+            self.in_flight -= 1
+        if ok and user not in streamer_meta:
+            # Açılış sürerken kanal streamers.txt'den çıkarıldı; sayfa açık kalırsa bir daha taranmaz
+            logger.info(f"{user} listeden çıkarıldığı için açılan sayfa kapatılıyor")
+            await close_stream(user)
+            self.stats["skipped"] += 1
+            return
+        if ok:
+            self.stats["launched"] += 1
+            self.latencies.append(time.time() - started)
+        else:
+            self.stats["failed"] += 1
+
+    async def _worker(self):
+        while True:
+            user = await self.queue.get()
+            self.queued.discard(user)
             try:
-                await pages[user].close()
-            except:
-                pass
-            del pages[user]
-        
-        if user in contexts:
+                if user not in self.pending or user in pages or user in self.launching:
+                    self.stats["skipped"] += 1
+                    continue
+                self.launching.add(user)
+                try:
+                    await self._launch(user)
+                finally:
+                    self.launching.discard(user)
+            except Exception as e:
+                logger.error(f"Açılış kuyruğu hatası - {user}: {e}")
+            finally:
+                self.pending.discard(user)
+                self.queue.task_done()
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.pending.clear()
+        self.queued.clear()
+        self.launching.clear()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+
+stream_launcher = StreamLauncher(LAUNCH_CONCURRENCY, LAUNCH_TIMEOUT)
+
+class SlotManager:
+    def __init__(self, max_pages: int, page_memory_mb: float, reserve_mb: float):
+        self.fixed = max_pages
+        self.page_memory_mb = page_memory_mb
+        self.reserve_mb = reserve_mb
+        self.limit = max_pages if max_pages > 0 else 1
+        self._computed_at = 0.0
+        self.stats = {"admitted": 0, "preempted": 0, "rejected": 0}
+        self.decisions = deque(maxlen=20)
+        self._last_decision = {}
+
+    def capacity(self) -> int:
+        if self.fixed > 0:
+            return self.fixed
+        now = time.time()
+        if now - self._computed_at >= 30:
+            # Boş RAM zaten açık sayfaları düşmüş halde; mevcut sayfalar kapasiteye geri eklenir
+            available_mb = psutil.virtual_memory().available / 1024 / 1024
+            self.limit = max(1, len(pages) + int((available_mb - self.reserve_mb) / self.page_memory_mb))
+            self._computed_at = now
+        return self.limit
+
+    def occupied(self) -> int:
+        return len(pages) + len(stream_launcher.pending)
+
+    def admit(self, user: str) -> Tuple[str, Optional[str]]:
+        if self.occupied() < self.capacity():
+            return self._record(user, "admit", None)
+        priority = get_streamer_priority(user)
+        # En düşük öncelikli (eşitlikte en yeni açılan) sayfa, daha yüksek öncelikli kanala yer açar
+        victim = min(pages, key=lambda u: (get_streamer_priority(u), -watch_times.get(u, 0)), default=None)
+        if victim is not None and get_streamer_priority(victim) < priority:
+            return self._record(user, "preempt", victim)
+        return self._record(user, "reject", None)
+
+    def _record(self, user: str, decision: str, victim: Optional[str]):
+        key = {"admit": "admitted", "preempt": "preempted", "reject": "rejected"}[decision]
+        self.stats[key] += 1
+        # Aynı kanal için tekrar eden ret kararları log'u doldurmasın
+        if decision != "reject" or self._last_decision.get(user) != "reject":
+            self.decisions.append((time.time(), user, decision, victim))
+            if decision == "preempt":
+                add_log(f"{user} (öncelik {get_streamer_priority(user)}) için {victim} kapatılıyor", event="admission", streamer=user)
+            elif decision == "reject":
+                add_log(f"{user} için boş slot yok ({self.occupied()}/{self.capacity()})", level="warning", event="admission", streamer=user)
+        self._last_decision[user] = decision
+        return decision, victim
+
+    def forget(self, user: str):
+        self._last_decision.pop(user, None)
+
+slot_manager = SlotManager(MAX_PAGES, PAGE_MEMORY_MB, MEMORY_RESERVE_MB)
+
+async def stop_watching(user: str, discard: bool = False):
+    stopping = time.perf_counter()
+    try:
+        page = pages.pop(user, None)
+        context = contexts.pop(user, None)
+        page_owners.pop(page, None)
+        finished = block_stats.pop(user, None)
+        if finished:
+            for key, value in finished.items():
+                block_totals[key] += value
+        if discard:
+            page_throttler.forget(user)
+        else:
+            await page_throttler.release(user)
+        if page is not None and context is not None and discard:
+            await context_pool.discard(context, page)
+        elif page is not None and context is not None:
+            # Sayfa kapatılmaz, havuza geri verilip sonraki kanalda yeniden kullanılır
+            await context_pool.release(context, page)
+        elif context is not None and context not in shared_contexts:
             try:
-                await contexts[user].close()
+                await context.close()
             except:
                 pass
-            del contexts[user]
             
         if user in watch_times:
-            del watch_times[user]
+            watch_ledger.record(user, watch_times.pop(user), time.time())
+        dashboard.mark_dirty()
         
-        log_message = f"[-] {user} yayını kapatıldı"
-        logs.append(f"[{time.strftime('%H:%M:%S')}] {log_message}")
+        add_log(f"[-] {user} yayını kapatıldı", event="stop", streamer=user)
         logger.info(f"Playwright kapatıldı - {user}")
         
     except Exception as e:
         logger.warning(f"Playwright kapatma hatası - {user}: {e}")
+    finally:
+        stop_seconds.observe(time.perf_counter() - stopping)
+
+async def open_stream(user: str) -> bool:
+    # Supervisor modunda sayfa bir worker sürecinde açılır, tek süreçte doğrudan burada
+    if shard_supervisor is not None:
+        return await shard_supervisor.open(user)
+    return await start_watching(user)
+
+async def close_stream(user: str, discard: bool = False):
+    if shard_supervisor is not None:
+        await shard_supervisor.close(user)
+    else:
+        await stop_watching(user, discard=discard)
+
+class PageWatchdog:
+    def __init__(self):
+        self.interval = WATCHDOG_INTERVAL
+        self.samples = {}  # kullanıcı -> {"baseline", "heap", "unresponsive"}
+        self.stats = {"checks": 0, "recycled": 0}
+        self.reasons = {}
+        self._task = None
+
+    async def _probe(self, page: Page):
+        return await asyncio.wait_for(
+            page.evaluate("() => [performance.memory ? performance.memory.usedJSHeapSize : 0, location.href]"),
+            timeout=WATCHDOG_RESPONSE_TIMEOUT,
+        )
+
+    async def check_page(self, user: str, page: Page) -> Optional[str]:
+        sample = self.samples.setdefault(user, {"baseline": None, "heap": 0.0, "unresponsive": 0})
+        if page.is_closed():
+            return "closed"
+        if page_throttler.is_frozen(user):
+            return None
+        try:
+            heap, url = await self._probe(page)
+        except Exception:
+            # Ölçüm sırasında dondurulan sayfa cevapsız sayılmaz
+            if page_throttler.is_frozen(user):
+                return None
+            sample["unresponsive"] += 1
+            if sample["unresponsive"] >= WATCHDOG_MAX_UNRESPONSIVE:
+                return "unresponsive"
+            return None
+        sample["unresponsive"] = 0
+        if url.startswith("chrome-error://") or url == "about:blank":
+            return "error_page"
+        heap_mb = heap / 1024 / 1024
+        sample["heap"] = heap_mb
+        if sample["baseline"] is None:
+            sample["baseline"] = heap_mb
+        if heap_mb > HEAP_LIMIT_MB:
+            return "heap_limit"
+        if heap_mb - sample["baseline"] > HEAP_GROWTH_LIMIT_MB:
+            return "heap_growth"
+        return None
+
+    def oversized_renderers(self) -> int:
+        count = 0
+        for child in script_process.children(recursive=True):
+            try:
+                if "--type=renderer" in " ".join(child.cmdline()) and child.memory_info().rss / 1024 / 1024 > RENDERER_RSS_LIMIT_MB:
+                    count += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return count
+
+    async def recycle(self, user: str, reason: str):
+        self.stats["recycled"] += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        self.samples.pop(user, None)
+        add_log(f"{user} sayfası yenileniyor ({reason})", level="warning", event="recycle", streamer=user)
+        logger.warning(f"Watchdog: {user} sayfası yenileniyor ({reason})")
+        # Sorunlu sayfa havuza dönmez; kanal aynı slotla yeniden kuyruğa alınır
+        await stop_watching(user, discard=True)
+        if user in current_online and user in streamer_meta or user in worker_assigned:
+            stream_launcher.submit(user)
+
+    async def run_once(self):
+        self.stats["checks"] += 1
+        users = list(pages.keys())
+        for user in list(self.samples):
+            if user not in pages:
+                del self.samples[user]
+        results = await asyncio.gather(*(self.check_page(u, pages[u]) for u in users), return_exceptions=True)
+        unhealthy = {u: r for u, r in zip(users, results) if isinstance(r, str)}
+        
+        # Renderer RSS'i sayfaya bağlanamıyor: sınırı aşan her süreç için en büyük heap'li sayfa yenilenir
+        oversized = await asyncio.to_thread(self.oversized_renderers)
+        if oversized:
+            candidates = sorted(
+                (u for u in users if u not in unhealthy and u in self.samples),
+                key=lambda u: self.samples[u]["heap"],
+                reverse=True,
+            )
+            for user in candidates[:oversized]:
+                unhealthy[user] = "renderer_rss"
+        
+        for user, reason in unhealthy.items():
+            if user in pages:
+                await self.recycle(user, reason)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Watchdog hatası: {e}")
+
+    def start(self):
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+page_watchdog = PageWatchdog()
+
+def configure_worker_logging(index: int):
+    # Worker'lar aynı dosyayı döndürmeye çalışmasın; her biri kendi log dosyasına yazar
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.RotatingFileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    file_handler = logging.handlers.RotatingFileHandler(
+        f'twitch_monitor.worker{index}.log', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(logging.Formatter(f'%(asctime)s - %(name)s[w{index}] - %(levelname)s - %(message)s'))
+    logger.addHandler(file_handler)
+
+def worker_main(index: int, commands, events, headless: bool):
+    # Ctrl+C tüm süreç grubuna gider; kapanışı supervisor yönetir
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    configure_worker_logging(index)
+    try:
+        asyncio.run(run_worker(index, commands, events, headless))
+    finally:
+        events.cancel_join_thread()
+
+async def worker_start(index: int, user: str, events, launching: dict):
+    try:
+        ok = await start_watching(user)
+    finally:
+        launching.pop(user, None)
+    events.put(("started", index, user, ok, watch_times.get(user)))
+
+async def worker_stop(user: str, launching: dict):
+    worker_assigned.discard(user)
+    stream_launcher.cancel(user)
+    task = launching.pop(user, None)
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    if user in pages:
+        await stop_watching(user)
+
+async def report_worker_state(index: int, events, launching: dict):
+    sent_version = 0
+    while True:
+        # Son rapordan beri eklenen olaylar supervisor'ün log paneline aktarılır
+        fresh = min(event_log.version - sent_version, len(event_log.events))
+        sent_version = event_log.version
+        new_events = [tuple(e) for e in islice(reversed(event_log.events), fresh)][::-1]
+        # Oturum süreleri supervisor'ün defterine yazılır; worker'daki kopya birikmesin
+        watch_ledger.buffer.clear()
+        browser_mb, _ = await asyncio.to_thread(get_browser_memory)
+        events.put(("state", index, {
+            "ready": browser is not None,
+            "pages": dict(watch_times),
+            "pending": sorted(stream_launcher.pending | set(launching)),
+            "blocks": {user: dict(stats) for user, stats in block_stats.items()},
+            "block_totals": dict(block_totals),
+            "heap": {user: sample["heap"] for user, sample in page_watchdog.samples.items()},
+            "recycled": page_watchdog.stats["recycled"],
+            "reasons": dict(page_watchdog.reasons),
+            "pool": {"idle": len(context_pool.idle), **context_pool.stats},
+            "throttle": {"pages": page_throttler.export(), "stats": dict(page_throttler.stats)},
+            "browser_mb": round(browser_mb, 1),
+            "events": new_events,
+            "metrics": {metric.name: metric.export() for metric in metric_registry},
+        }))
+        await asyncio.sleep(WORKER_REPORT_INTERVAL)
+
+async def run_worker(index: int, commands, events, headless: bool):
+    global headless_mode, worker_index
+    worker_index = index
+    headless_mode = headless
+    launching = {}
+    budget = SHUTDOWN_TIMEOUT
+    stopping = asyncio.Event()
+    # Sadece worker'a gelen SIGTERM'de de tarayıcı kapatılıp çıkılır
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    except NotImplementedError:
+        pass
+    reporter = spawn(report_worker_state(index, events, launching))
+    if not await init_playwright():
+        events.put(("fatal", index, "Playwright başlatılamadı"))
+        return
+    await context_pool.warm()
+    context_pool.start()
+    stream_launcher.start()
+    page_watchdog.start()
+    page_throttler.start()
+    loop_lag_monitor.start()
+    if DIAGNOSTICS:
+        loop_diagnostics.start()
+    logger.info(f"Worker {index} hazır (pid {os.getpid()})")
+    
+    try:
+        while not stopping.is_set():
+            try:
+                # Bloklayan get kısa aralıklarla döner; kapanışta executor thread'i takılı kalmaz
+                command = await asyncio.to_thread(commands.get, True, 1.0)
+            except queue.Empty:
+                continue
+            kind = command[0]
+            if kind == "start":
+                user, priority = command[1], command[2]
+                # Kısma politikası önceliğe göre seçilir; worker streamers.txt'yi okumaz
+                streamer_meta[user] = {"priority": priority}
+                worker_assigned.add(user)
+                if user not in pages and user not in launching:
+                    launching[user] = spawn(worker_start(index, user, events, launching))
+                elif user in pages:
+                    events.put(("started", index, user, True, watch_times.get(user)))
+            elif kind == "stop":
+                streamer_meta.pop(command[1], None)
+                await worker_stop(command[1], launching)
+            elif kind == "retune":
+                user = command[1]
+                if user in worker_assigned:
+                    streamer_meta[user] = {"priority": command[2]}
+                    spawn(page_throttler.retune(user))
+            elif kind == "shutdown":
+                budget = command[1] if len(command) > 1 else SHUTDOWN_TIMEOUT
+                break
+    finally:
+        deadline = time.monotonic() + budget
+        reporter.cancel()
+        for task in list(launching.values()):
+            task.cancel()
+        await asyncio.gather(*launching.values(), return_exceptions=True)
+        await page_watchdog.stop()
+        await page_throttler.stop()
+        await stream_launcher.stop()
+        watching = await close_pages(deadline)
+        forced = await close_browser(deadline)
+        logger.info(f"Worker {index} kapandı - {len(watching)} sayfa" + (" (tarayıcı öldürüldü)" if forced else ""))
+
+class ShardSupervisor:
+    # API sorgusu, slotlar, defter ve arayüz bu süreçte kalır; sayfalar worker süreçlerine dağıtılır
+    def __init__(self, count: int):
+        self.count = count
+        self.mp = multiprocessing.get_context("spawn")
+        self.events = self.mp.Queue()
+        self.workers = {}
+        self.assignments = {}  # kullanıcı -> worker
+        self.waiters = {}
+        self.missing = {}
+        self.retired = {"blocked": 0, "allowed": 0, "bytes_saved": 0, "recycled": 0}
+        self.stats = {"restarts": 0, "moved": 0, "lost": 0}
+        self._tasks = []
+
+    def _start_worker(self, index: int):
+        commands = self.mp.Queue()
+        proc = self.mp.Process(target=worker_main, args=(index, commands, self.events, headless_mode), name=f"watchbot-worker-{index}", daemon=True)
+        proc.start()
+        previous = self.workers.get(index)
+        self.workers[index] = {
+            "proc": proc,
+            "commands": commands,
+            "started_at": time.time(),
+            "reported_at": time.time(),
+            "state": {},
+            "restarts": previous["restarts"] if previous else 0,
+            "failures": previous["failures"] if previous else 0,
+            "restart_at": 0.0,
+            "down": False,
+        }
+        logger.info(f"Worker {index} başlatıldı (pid {proc.pid})")
+
+    def _send(self, index: int, command: tuple):
+        worker = self.workers.get(index)
+        if worker is not None and worker["proc"].is_alive():
+            worker["commands"].put(command)
+
+    def alive(self) -> list:
+        return [i for i, w in self.workers.items() if w["proc"].is_alive()]
+
+    def loads(self, settled: bool = False) -> Dict[int, int]:
+        loads = {i: 0 for i in self.alive()}
+        for user, index in self.assignments.items():
+            if index in loads and (not settled or user in pages):
+                loads[index] += 1
+        return loads
+
+    def retune(self, user: str):
+        index = self.assignments.get(user)
+        if index is not None:
+            self._send(index, ("retune", user, get_streamer_priority(user)))
+
+    async def open(self, user: str) -> bool:
+        loads = self.loads()
+        if not loads:
+            logger.error(f"{user} için çalışan worker yok")
+            return False
+        index = min(loads, key=lambda i: (loads[i], i))
+        self.assignments[user] = index
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[user] = future
+        self._send(index, ("start", user, get_streamer_priority(user)))
+        try:
+            ok, started = await future
+        except asyncio.CancelledError:
+            # Zaman aşımı: worker açılışı yarıda keser ya da açılmış sayfayı kapatır
+            self._send(index, ("stop", user))
+            self.assignments.pop(user, None)
+            raise
+        finally:
+            self.waiters.pop(user, None)
+        if not ok:
+            self.assignments.pop(user, None)
+            return False
+        pages[user] = index
+        watch_times[user] = started or time.time()
+        dashboard.mark_dirty()
+        add_log(f"[+] {user} yayını worker {index} üzerinde açıldı", event="start", streamer=user)
+        return True
+
+    def _forget(self, user: str, worker_died: bool = False):
+        index = self.assignments.pop(user, None)
+        pages.pop(user, None)
+        page_watchdog.samples.pop(user, None)
+        self.missing.pop(user, None)
+        finished = block_stats.pop(user, None)
+        # Normal kapanışta worker bu sayaçları kendi block_totals'ına zaten ekler;
+        # sadece ölen worker'ın açık sayfalarınınki kaybolmasın diye saklanır
+        if finished and worker_died:
+            for key, value in finished.items():
+                self.retired[key] += value
+        if user in watch_times:
+            watch_ledger.record(user, watch_times.pop(user), time.time())
+        dashboard.mark_dirty()
+        return index
+
+    def forget_all(self):
+        for user in list(self.assignments):
+            self._forget(user)
+
+    async def close(self, user: str):
+        index = self._forget(user)
+        if index is not None:
+            self._send(index, ("stop", user))
+        add_log(f"[-] {user} yayını kapatıldı", event="stop", streamer=user)
+        logger.info(f"Yayın kapatıldı - {user} (worker {index})")
+
+    def _requeue(self, users):
+        for user in users:
+            if user in current_online and user in streamer_meta:
+                stream_launcher.submit(user)
+
+    def _handle(self, message: tuple):
+        kind, index = message[0], message[1]
+        worker = self.workers.get(index)
+        if kind == "started":
+            _, _, user, ok, started = message
+            future = self.waiters.get(user)
+            if future is not None and not future.done() and self.assignments.get(user) == index:
+                future.set_result((ok, started))
+            elif ok and self.assignments.get(user) != index:
+                # Artık bu worker'a ait olmayan geç açılış
+                self._send(index, ("stop", user))
+        elif kind == "state" and worker is not None:
+            state = message[2]
+            worker["state"] = state
+            worker["reported_at"] = time.time()
+            if state.get("ready"):
+                worker["failures"] = 0
+            for ts, level, event, text, streamer in state.get("events", ()):
+                if event not in ("start", "stop"):
+                    event_log.add(f"[w{index}] {text}", level, event, streamer)
+            present = set(state["pages"]) | set(state["pending"])
+            lost = []
+            for user, owner in list(self.assignments.items()):
+                if owner != index or user not in pages:
+                    continue
+                if user in present:
+                    self.missing.pop(user, None)
+                    block_stats[user] = state["blocks"].get(user, {"blocked": 0, "allowed": 0, "bytes_saved": 0})
+                    if user in state["heap"]:
+                        page_watchdog.samples[user] = {"heap": state["heap"][user]}
+                    continue
+                # Watchdog yenilemesi arada raporlanabilir; iki rapor üst üste yoksa sayfa kaybolmuştur
+                self.missing[user] = self.missing.get(user, 0) + 1
+                if self.missing[user] >= 2:
+                    lost.append(user)
+            for user in lost:
+                self.stats["lost"] += 1
+                self._forget(user)
+                add_log(f"{user} sayfası worker {index} üzerinde kayboldu, yeniden açılıyor", level="warning", event="worker", streamer=user)
+            self._requeue(lost)
+            # Sayfa aşama süreleri worker'larda ölçülür; /metrics hepsini toplar
+            for metric in metric_registry:
+                if metric.name in state.get("metrics", {}):
+                    metric.remote[index] = state["metrics"][metric.name]
+            self._aggregate()
+        elif kind == "fatal" and worker is not None:
+            add_log(f"Worker {index} hatası: {message[2]}", level="error", event="worker")
+            logger.error(f"Worker {index} hatası: {message[2]}")
+
+    def _aggregate(self):
+        # Worker'lardaki sayaçlar panelin ve /status.json'un okuduğu yerel yapılara toplanır
+        totals = {key: self.retired[key] for key in block_totals}
+        recycled = self.retired["recycled"]
+        reasons = {}
+        pool_stats = dict.fromkeys(context_pool.stats, 0)
+        throttle_stats = dict.fromkeys(page_throttler.stats, 0)
+        throttled = {}
+        for worker in self.workers.values():
+            state = worker["state"]
+            for key, value in state.get("block_totals", {}).items():
+                totals[key] += value
+            recycled += state.get("recycled", 0)
+            for reason, count in state.get("reasons", {}).items():
+                reasons[reason] = reasons.get(reason, 0) + count
+            for key in pool_stats:
+                pool_stats[key] += state.get("pool", {}).get(key, 0)
+            throttle = state.get("throttle", {})
+            for key in throttle_stats:
+                throttle_stats[key] += throttle.get("stats", {}).get(key, 0)
+            throttled.update({user: tuple(value) for user, value in throttle.get("pages", {}).items()})
+        block_totals.update(totals)
+        page_watchdog.stats["recycled"] = recycled
+        page_watchdog.reasons = reasons
+        context_pool.stats.update(pool_stats)
+        page_throttler.stats.update(throttle_stats)
+        page_throttler.remote = throttled
+
+    def _retire(self, index: int):
+        # Ölen worker'ın sayaçları kaybolmasın
+        state = self.workers[index]["state"]
+        for key, value in state.get("block_totals", {}).items():
+            self.retired[key] += value
+        self.retired["recycled"] += state.get("recycled", 0)
+        self.workers[index]["state"] = {}
+
+    def _on_worker_died(self, index: int):
+        worker = self.workers[index]
+        worker["down"] = True
+        users = [u for u, i in self.assignments.items() if i == index]
+        add_log(f"Worker {index} durdu (çıkış kodu {worker['proc'].exitcode}), {len(users)} yayın yeniden dağıtılıyor", level="error", event="worker")
+        logger.error(f"Worker {index} durdu (çıkış kodu {worker['proc'].exitcode})")
+        for user in users:
+            future = self.waiters.get(user)
+            if future is not None and not future.done():
+                future.set_result((False, None))
+            self._forget(user, worker_died=True)
+        self._retire(index)
+        worker["commands"].cancel_join_thread()
+        worker["commands"].close()
+        # Açılışta sürekli çöken worker'ı sıkı döngüde yeniden başlatma
+        if time.time() - worker["started_at"] < WORKER_STALE_TIMEOUT:
+            worker["failures"] += 1
+        worker["restart_at"] = time.time() + min(60, 2 ** worker["failures"]) if worker["failures"] else 0.0
+        self._requeue(users)
+
+    async def _read_events(self):
+        while True:
+            try:
+                message = await asyncio.to_thread(self.events.get, True, 1.0)
+            except queue.Empty:
+                continue
+            try:
+                self._handle(message)
+            except Exception as e:
+                logger.error(f"Worker mesajı işlenemedi: {e}")
+
+    async def rebalance(self):
+        # Sadece açık sayfalar taşınır; fark eşiğin altına inene kadar her turda bir yayın
+        loads = self.loads(settled=True)
+        if len(loads) < 2:
+            return
+        busiest = max(loads, key=lambda i: (loads[i], -i))
+        idlest = min(loads, key=lambda i: (loads[i], i))
+        if loads[busiest] - loads[idlest] <= WORKER_REBALANCE_THRESHOLD:
+            return
+        movable = [u for u, i in self.assignments.items() if i == busiest and u in pages]
+        user = min(movable, key=lambda u: (get_streamer_priority(u), -watch_times.get(u, 0)))
+        self.stats["moved"] += 1
+        add_log(f"{user} worker {busiest} → {idlest} taşınıyor ({loads[busiest]}/{loads[idlest]})", event="worker", streamer=user)
+        await self.close(user)
+        stream_launcher.submit(user)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(WORKER_HEALTH_INTERVAL)
+            try:
+                now = time.time()
+                for index, worker in list(self.workers.items()):
+                    proc = worker["proc"]
+                    if proc.is_alive() and now - worker["reported_at"] > WORKER_STALE_TIMEOUT:
+                        logger.error(f"Worker {index} {WORKER_STALE_TIMEOUT:.0f}sn rapor vermedi, öldürülüyor")
+                        proc.kill()
+                        await asyncio.to_thread(proc.join, 5)
+                    if not proc.is_alive():
+                        if not worker["down"]:
+                            self._on_worker_died(index)
+                        if now >= worker["restart_at"]:
+                            self.stats["restarts"] += 1
+                            worker["restarts"] += 1
+                            self._start_worker(index)
+                await self.rebalance()
+            except Exception as e:
+                logger.error(f"Worker sağlık kontrolü hatası: {e}")
+
+    def start(self):
+        for index in range(self.count):
+            self._start_worker(index)
+        self._tasks = [spawn(self._read_events()), spawn(self._health_loop())]
+
+    def snapshot(self) -> list:
+        now = time.time()
+        result = []
+        for index, worker in sorted(self.workers.items()):
+            state = worker["state"]
+            result.append({
+                "index": index,
+                "pid": worker["proc"].pid,
+                "alive": worker["proc"].is_alive(),
+                "ready": bool(state.get("ready")),
+                "pages": sum(1 for i in self.assignments.values() if i == index),
+                "pending": len(state.get("pending", ())),
+                "browser_mb": state.get("browser_mb", 0.0),
+                "restarts": worker["restarts"],
+                "last_report": round(now - worker["reported_at"], 1),
+            })
+        return result
+
+    async def stop(self, timeout: float = SHUTDOWN_TIMEOUT):
+        # Worker'lar kendi sayfalarını bu sürenin biraz altında kapatır; hepsi birlikte beklenir
+        for index in self.alive():
+            self._send(index, ("shutdown", max(timeout - 1, 1)))
+        await asyncio.gather(*(asyncio.to_thread(w["proc"].join, timeout) for w in self.workers.values()))
+        for worker in self.workers.values():
+            if worker["proc"].is_alive():
+                logger.warning(f"Worker {worker['proc'].name} zamanında kapanmadı, tarayıcısıyla birlikte öldürülüyor")
+                processes = process_tree(worker["proc"].pid)
+                worker["proc"].kill()
+                await asyncio.to_thread(kill_processes, processes)
+            worker["commands"].cancel_join_thread()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
 
 def format_minutes(seconds: float) -> str:
     return f"{int(seconds//60)} dk {int(seconds%60)} sn"
@@ -398,7 +2923,68 @@ def get_system_stats():
         logger.error(f"Sistem istatistikleri alma hatası: {e}")
         return 0, 0, 0, "N/A", 0, 0, 0
 
+def sample_system_stats(force: bool = False):
+    # psutil çağrıları (özellikle sensörler ve alt süreç taraması) pahalı; kendi aralığında örneklenir
+    now = time.time()
+    if force or system_stats_cache["value"] is None or now - system_stats_cache["at"] >= SYSTEM_STATS_INTERVAL:
+        system_stats_cache["value"] = (get_system_stats(), get_browser_memory())
+        system_stats_cache["at"] = now
+    return system_stats_cache["value"]
+
+def get_block_summary() -> dict:
+    summary = dict(block_totals)
+    for stats in block_stats.values():
+        for key, value in stats.items():
+            summary[key] += value
+    return summary
+
+def get_browser_memory():
+    # Chromium alt süreçlerinin toplam RSS'i ve yayın başına düşen pay (MB)
+    total = 0
+    try:
+        for child in script_process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    except Exception:
+        pass
+    total_mb = total / 1024 / 1024
+    per_stream_mb = total_mb / len(pages) if pages else 0
+    return total_mb, per_stream_mb
+
+class StreamerView:
+    # Streamer listesinin sıralı hali; her karede yeniden sort etmek yerine farklar işlenir
+    def __init__(self):
+        self.items = []
+        self.version = 0
+
+    def replace(self, streamers):
+        new = set(streamers)
+        old = set(self.items)
+        if new == old:
+            return
+        if not self.items or len(new ^ old) > len(new) // 2:
+            self.items = sorted(new)
+        else:
+            for user in old - new:
+                i = bisect.bisect_left(self.items, user)
+                del self.items[i]
+            for user in new - old:
+                bisect.insort(self.items, user)
+        self.version += 1
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+streamer_view = StreamerView()
+
+# rich.layout/live/table/progress import'ları sadece panel çizilecekse yüklenir; daemon modunda hiç yüklenmez
 def make_layout():
+    from rich.layout import Layout
     layout = Layout()
     layout.split_row(
         Layout(name="left", ratio=2),
@@ -407,23 +2993,52 @@ def make_layout():
     )
     return layout
 
-def render_panels(online_streamers, all_streamers):
+def render_watch_panel(online_streamers):
+    from rich.panel import Panel
+    from rich.table import Table
     table = Table(title="[bold cyan]📺 İzleme Durumu[/]", style="bright_white")
     table.add_column("Streamer", style="bold yellow")
     table.add_column("Süre", style="bold green")
     table.add_column("Durum", style="bold blue")
     
     if pages:
+        now = time.time()
         for user in pages:
-            elapsed = time.time() - watch_times[user]
-            status = "🔴 CANLI" if user in online_streamers else "⚫ OFFLINE"
+            elapsed = now - watch_times.get(user, now)
+            if channel_states.state(user) == "suspect":
+                status = "🟡 ŞÜPHELİ"
+            else:
+                status = "🔴 CANLI" if user in online_streamers else "⚫ OFFLINE"
             table.add_row(user, format_minutes(elapsed), status)
     else:
         table.add_row("---", "---", "Henüz yayın yok")
     
-    left_panel = Panel(table, title="[bold blue]Aktif Yayınlar[/]")
+    return Panel(table, title="[bold blue]Aktif Yayınlar[/]")
+
+def render_streamer_table(online_streamers, all_streamers):
+    from rich.table import Table
+    streamer_table = Table(title="[bold green]📋 Streamer Durumları[/]", style="bright_white")
+    streamer_table.add_column("Streamer", style="bold yellow")
+    streamer_table.add_column("Durum", style="bold blue")
+    streamer_table.add_column("İzleniyor", style="bold green")
     
-    uptime, sys_cpu, sys_mem, gpu_temp, script_cpu, script_mem_mb, script_mem_percent = get_system_stats()
+    for streamer in all_streamers:
+        if channel_states.state(streamer) == "suspect":
+            status = "🟡 ŞÜPHELİ"
+        elif streamer in online_streamers:
+            status = "🔴 ONLINE"
+        else:
+            status = "⚫ OFFLINE"
+        
+        watching = "✅ EVET" if streamer in pages else "❌ HAYIR"
+        streamer_table.add_row(streamer, status, watching)
+    return streamer_table
+
+def render_system_panel(stats, streamer_table):
+    from rich.panel import Panel
+    from rich.progress import BarColumn, Progress, TextColumn
+    from rich.table import Table
+    (uptime, sys_cpu, sys_mem, gpu_temp, script_cpu, script_mem_mb, script_mem_percent), (browser_mem_mb, per_stream_mb) = stats
     
     cookie_count = sum([1 for token in [AUTH_TOKEN, LOGIN_TOKEN, PERSISTENT_TOKEN, TWILIGHT_USER] if token])
     cookie_status = f"✅ {cookie_count}/4" if cookie_count > 0 else "❌ 0/4"
@@ -436,27 +3051,32 @@ def render_panels(online_streamers, all_streamers):
     sys_table.add_row("Script CPU", f"{script_cpu:.1f}%")
     sys_table.add_row("Script RAM", f"{script_mem_mb:.1f}MB ({script_mem_percent:.1f}%)")
     sys_table.add_row("Aktif Yayın", f"{len(pages)}")
+    context_mode = f"paylaşımlı ({len(shared_contexts)} context)" if SHARED_CONTEXT else "yayın başına"
+    sys_table.add_row("Tarayıcı RAM", f"{browser_mem_mb:.0f}MB ({per_stream_mb:.0f}MB/yayın)")
+    sys_table.add_row("Context Modu", context_mode)
+    launch_p = stream_launcher.percentiles()
+    sys_table.add_row("Slotlar", f"{slot_manager.occupied()}/{slot_manager.capacity()} (ret {slot_manager.stats['rejected']}, öncelikli {slot_manager.stats['preempted']})")
+    sys_table.add_row("Watchdog", f"{page_watchdog.stats['recycled']} sayfa yenilendi")
+    if page_throttler.rules or page_throttler.default != "none":
+        throttled = page_throttler.counts()
+        frozen = sum(1 for user in pages if page_throttler.is_frozen(user))
+        sys_table.add_row("Sekme Kısma", f"{' / '.join(f'{name} {count}' for name, count in throttled.items())} ({frozen} donmuş)")
+    if shard_supervisor is not None:
+        loads = shard_supervisor.loads()
+        sys_table.add_row("Worker'lar", f"{len(loads)}/{WORKERS} çalışıyor, dağılım {'/'.join(str(loads.get(i, '-')) for i in range(WORKERS))} ({shard_supervisor.stats['restarts']} yeniden başlatma)")
+    sys_table.add_row("Açılış Kuyruğu", f"{stream_launcher.depth()} bekliyor, {stream_launcher.in_flight}/{stream_launcher.concurrency} açılıyor")
+    sys_table.add_row("Açılış Süresi", f"p50 {launch_p['p50']:.1f}s / p95 {launch_p['p95']:.1f}s / p99 {launch_p['p99']:.1f}s")
+    block_summary = get_block_summary()
+    sys_table.add_row("Engellenen İstek", f"{block_summary['blocked']}/{block_summary['blocked'] + block_summary['allowed']} (~{block_summary['bytes_saved'] / 1024 / 1024:.0f}MB tasarruf)")
     sys_table.add_row("Cookie Durumu", cookie_status)
+    sys_table.add_row("Sayfa Havuzu", f"{len(context_pool.idle)} hazır (isabet {context_pool.stats['hits']}/{context_pool.stats['hits'] + context_pool.stats['misses']})")
+    sys_table.add_row("API Çağrısı", f"{helix_stats['requests']} ({get_api_rate():.0f}/saat)")
     sys_table.add_row("", "")
     
     sys_table.add_row("Sistem CPU", f"{sys_cpu:.1f}%")
     sys_table.add_row("Sistem RAM", f"{sys_mem:.1f}%")
     sys_table.add_row("GPU Temp", f"{gpu_temp}")
     
-    streamer_table = Table(title="[bold green]📋 Streamer Durumları[/]", style="bright_white")
-    streamer_table.add_column("Streamer", style="bold yellow")
-    streamer_table.add_column("Durum", style="bold blue")
-    streamer_table.add_column("İzleniyor", style="bold green")
-    
-    for streamer in sorted(all_streamers):
-        if streamer in online_streamers:
-            status = "🔴 ONLINE"
-        else:
-            status = "⚫ OFFLINE"
-        
-        watching = "✅ EVET" if streamer in pages else "❌ HAYIR"
-        streamer_table.add_row(streamer, status, watching)
-    
     sys_cpu_bar = Progress(
         TextColumn("Sys CPU", style="bold cyan"),
         BarColumn(bar_width=12, complete_style="red"),
@@ -494,19 +3114,254 @@ def render_panels(online_streamers, all_streamers):
         streamer_table
     )
     
-    middle_panel = Panel(middle_content, title="[bold magenta]Sistem Durumu[/]")
-    
-    log_text = "\n".join(logs[-20:]) if logs else "Henüz log yok."
-    right_panel = Panel(log_text, title="[bold red]📜 Sistem Logları[/]", height=25)
-    
-    return left_panel, middle_panel, right_panel
+    return Panel(middle_content, title="[bold magenta]Sistem Durumu[/]")
+
+def render_log_panel():
+    from rich.panel import Panel
+    log_text = "\n".join(e.format() for e in event_log.recent(20)) if len(event_log) else "Henüz log yok."
+    return Panel(log_text, title="[bold red]📜 Sistem Logları[/]", height=25)
+
+class Dashboard:
+    # Her panel, girdilerinin imzası değişmediği sürece önbellekten verilir
+    def __init__(self):
+        self.state_version = 0
+        self._cache = {}
+        self.rebuilds = {"left": 0, "middle": 0, "streamers": 0, "right": 0}
+
+    def mark_dirty(self):
+        self.state_version += 1
+
+    def _cached(self, name: str, signature, build):
+        entry = self._cache.get(name)
+        if entry is not None and entry[0] == signature:
+            return entry[1], False
+        value = build()
+        self._cache[name] = (signature, value)
+        self.rebuilds[name] += 1
+        return value, True
+
+    def render(self, online_streamers, all_streamers, force_stats: bool = False):
+        now = int(time.time())
+        stats = sample_system_stats(force_stats)
+        
+        # Süre sütunu saniyelik değiştiği için sol panel saniyede bir yenilenir
+        left, left_changed = self._cached("left", (now, self.state_version), lambda: render_watch_panel(online_streamers))
+        streamer_table, table_changed = self._cached(
+            "streamers",
+            (self.state_version, getattr(all_streamers, "version", id(all_streamers))),
+            lambda: render_streamer_table(online_streamers, all_streamers),
+        )
+        counters = (
+            len(pages), slot_manager.stats["rejected"], slot_manager.stats["preempted"], stream_launcher.depth(), stream_launcher.in_flight, stream_launcher.stats["launched"],
+            len(context_pool.idle), context_pool.stats["hits"], helix_stats["requests"], len(shared_contexts),
+            page_watchdog.stats["recycled"], tuple(shard_supervisor.loads().items()) if shard_supervisor else (),
+        )
+        middle, middle_changed = self._cached(
+            "middle",
+            (system_stats_cache["at"], self.rebuilds["streamers"], counters),
+            lambda: render_system_panel(stats, streamer_table),
+        )
+        right, right_changed = self._cached("right", event_log.version, render_log_panel)
+        changed = left_changed or middle_changed or right_changed
+        return (left, middle, right), changed
+
+dashboard = Dashboard()
+
+def render_panels(online_streamers, all_streamers):
+    panels, _ = dashboard.render(online_streamers, all_streamers)
+    return panels
 
 def is_interactive():
-    import sys
     return hasattr(sys.stdin, 'isatty') and sys.stdin.isatty()
 
+def is_daemon() -> bool:
+    if DAEMON in ["true", "1", "yes"]:
+        return True
+    if DAEMON in ["false", "0", "no"]:
+        return False
+    return AUTO_START and not is_interactive()
+
+def build_state_snapshot(watching: Optional[Dict[str, float]] = None, resume: Optional[list] = None) -> dict:
+    # "watching" çökmede deftere yazılacak açık oturumlar, "resume" geri açılacak yayınlar
+    watching = dict(watch_times) if watching is None else watching
+    return {
+        "version": 1,
+        "saved_at": time.time(),
+        "watching": watching,
+        "resume": list(watching) if resume is None else resume,
+        "online": {
+            user: {k: item.get(k) for k in ("user_login", "started_at", "title", "game_name") if k in item}
+            for user, item in current_online.items()
+        },
+        "token": {"value": token_manager.token, "expires_at": token_manager.expires_at} if token_manager.token else None,
+    }
+
+def write_state_snapshot(path: str, snapshot: dict):
+    # Geçici dosyaya yaz, fsync et, sonra rename: yarım yazılmış snapshot asla görülmez
+    # App token'ı taşıdığı için dosya sadece sahibine okunur (0600) oluşturulur
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, 0o600)  # yarım kalmış eski .tmp farklı izinle duruyor olabilir
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+def load_state_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != 1:
+            return None
+        return snapshot
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Durum snapshot'ı okunamadı: {e}")
+        return None
+
+async def save_state_snapshot(watching: Optional[Dict[str, float]] = None, resume: Optional[list] = None):
+    snapshot = build_state_snapshot(watching, resume)
+    try:
+        await asyncio.to_thread(write_state_snapshot, STATE_PATH, snapshot)
+    except Exception as e:
+        logger.error(f"Durum snapshot'ı yazılamadı: {e}")
+
+async def snapshot_loop():
+    while True:
+        await asyncio.sleep(STATE_SNAPSHOT_INTERVAL)
+        await save_state_snapshot()
+
+def apply_state_snapshot(snapshot: dict) -> list:
+    # Çökmeden önceki açık oturumlar deftere yazılır; yayınlar yeni bir oturumla devam eder
+    saved_at = snapshot.get("saved_at", 0)
+    watching = snapshot.get("watching") or {}
+    for user, start in watching.items():
+        watch_ledger.record(user, start, saved_at)
+    
+    token = snapshot.get("token")
+    if token and token.get("value") and not token_manager.token:
+        token_manager.token = token["value"]
+        token_manager.expires_at = token.get("expires_at", 0)
+    
+    age = time.time() - saved_at
+    if age > RESUME_MAX_AGE:
+        add_log(f"Snapshot {age / 60:.0f} dk eski, yayınlar geri açılmıyor", level="warning", event="restore")
+        return []
+    
+    for user, item in (snapshot.get("online") or {}).items():
+        if user in streamer_meta:
+            current_online[user] = item
+            channel_states.mark_live(user)
+    dashboard.mark_dirty()
+    resume = [u for u in snapshot.get("resume", watching) if u in streamer_meta]
+    resume.sort(key=get_streamer_priority, reverse=True)
+    return resume
+
+async def restore_sessions(users: list):
+    restore_stats["requested"] = len(users)
+    for user in users:
+        decision, victim = slot_manager.admit(user)
+        if decision == "reject":
+            continue
+        if victim is not None:
+            await close_stream(victim)
+        stream_launcher.submit(user)
+        # Hepsi aynı anda kuyruğa girip tarayıcıyı boğmasın
+        await asyncio.sleep(RESTORE_STAGGER)
+    while any(u in stream_launcher.pending for u in users):
+        await asyncio.sleep(0.5)
+    restored = sum(1 for u in users if u in pages)
+    restore_stats["restored"] = restored
+    restore_stats["seconds"] = round(time.time() - start_time, 2)
+    add_log(f"{restored}/{len(users)} yayın {restore_stats['seconds']:.1f}sn'de geri açıldı", event="restore")
+    logger.info(f"Geri yükleme: {restored}/{len(users)} yayın, süreçten itibaren {restore_stats['seconds']:.1f}sn")
+
+async def apply_online_result(online: Optional[Dict[str, dict]], scanned):
+    if online is None:
+        # Sonuç bilinmiyor: hiçbir kanal çevrimdışı sayılmaz, sayfalar açık kalır
+        channel_states.stats["unknown_polls"] += 1
+        add_log("API sonucu alınamadı, kanal durumları korunuyor", level="warning", event="api")
+        return
+    
+    # Sadece sorgulanan kanalların durumu güncellenir; doğrulama turu listenin geri kalanını silmez
+    now = time.time()
+    states = {}
+    for user in scanned:
+        state = states[user] = channel_states.observe(user, user in online, now)
+        if state == "live" and user in online:
+            current_online[user] = online[user]
+        elif state == "offline":
+            current_online.pop(user, None)
+    dashboard.mark_dirty()
+    
+    # Önce kapananlar: boşalan slotlar aynı turda yeni açılışlara kalsın
+    offline = {u for u, state in states.items() if state == "offline"}
+    for user in list(stream_launcher.pending):
+        if user in offline:
+            stream_launcher.cancel(user)
+    offline_streamers = [u for u in list(pages.keys()) if u in offline]
+    if offline_streamers:
+        close_tasks = [close_stream(user) for user in offline_streamers]
+        await asyncio.gather(*close_tasks, return_exceptions=True)
+        for user in offline_streamers:
+            channel_states.note_closed(user, now)
+    for user in offline:
+        slot_manager.forget(user)
+    
+    # Açılışlar kuyruğa alınır; sınırlı sayıda worker tek tek ve kendi süre sınırıyla açar.
+    # Slotlar doluysa yüksek öncelikli kanallar önce değerlendirilir ve gerekirse en düşük öncelikliyi kapatır.
+    candidates = [
+        u for u in online
+        if states.get(u) == "live" and u in streamer_meta and u not in pages and u not in stream_launcher.pending
+    ]
+    candidates.sort(key=get_streamer_priority, reverse=True)
+    new_streamers = []
+    for user in candidates:
+        decision, victim = slot_manager.admit(user)
+        if decision == "reject":
+            continue
+        if victim is not None:
+            await close_stream(victim)
+        if stream_launcher.submit(user):
+            channel_states.note_launch(user, now)
+            new_streamers.append(user)
+    if new_streamers:
+        add_log(f"{len(new_streamers)} streamer açılış kuyruğuna eklendi", event="launch_queue")
+
+async def poll_once():
+    now = time.time()
+    kind = poll_scheduler.due(now)
+    if kind == "discovery":
+        poll_scheduler.mark(kind, now)
+        try:
+            streamers = list(streamer_meta)
+            online = await get_online_streamers(streamers)
+            if online is not None:
+                add_log(f"API kontrolü: {len(online)} online streamer", event="api")
+            await apply_online_result(online, streamers)
+        except Exception as e:
+            add_log(f"API hatası: {str(e)}", level="error", event="api")
+            logger.error(f"API hatası: {e}")
+    elif kind == "confirm":
+        watched = list(pages.keys())
+        poll_scheduler.mark(kind, now)
+        if watched:
+            online = await get_online_streamers(watched)
+            await apply_online_result(online, watched)
+
 async def monitor_streams():
-    global headless_mode
+    global headless_mode, shard_supervisor, daemon_mode, state_loaded
     
     console.print("[bold yellow]🎮 Twitch Stream Monitor v3.1 (Optimized - No Stream)[/]")
     console.print(f"[cyan]Cookie Durumu: {sum([1 for token in [AUTH_TOKEN, LOGIN_TOKEN, PERSISTENT_TOKEN, TWILIGHT_USER] if token])}/4[/]")
@@ -529,106 +3384,247 @@ async def monitor_streams():
             console.print("\n[bold red]Program iptal edildi.[/]")
             return
     
-    logs.append(f"[{time.strftime('%H:%M:%S')}] Monitor başlatıldı - Headless: {headless_mode} - NO STREAM MODE")
-    logger.info(f"Monitor başlatıldı - Headless: {headless_mode} - NO STREAM MODE")
+    daemon_mode = is_daemon()
+    add_log(f"Monitor başlatıldı - Headless: {headless_mode} - Daemon: {daemon_mode} - NO STREAM MODE", event="monitor")
+    logger.info(f"Monitor başlatıldı - Headless: {headless_mode} - Daemon: {daemon_mode} - NO STREAM MODE")
     
-    if not await init_playwright():
-        console.print("[bold red]❌ Playwright başlatılamadı![/]")
-        return
+    if WORKERS > 1:
+        # Tarayıcılar worker süreçlerinde; bu süreç sadece API, slotlar ve arayüzle uğraşır
+        shard_supervisor = ShardSupervisor(WORKERS)
+        shard_supervisor.start()
+        stream_launcher.concurrency = max(LAUNCH_CONCURRENCY, 1) * WORKERS
+        add_log(f"{WORKERS} worker süreci başlatıldı", event="worker")
+    else:
+        if not await init_playwright():
+            console.print("[bold red]❌ Playwright başlatılamadı![/]")
+            return
+        
+        await context_pool.warm()
+        context_pool.start()
+        page_watchdog.start()
+        page_throttler.start()
+    stream_launcher.start()
+    watch_ledger.start()
+    loop_lag_monitor.start()
     
     try:
-        token = get_app_token()
         streamers = read_streamers(STREAMERS_FILE)
         
         if not streamers:
             console.print("[bold red]❌ Streamer listesi yüklenemedi![/]")
             return
         
-        logs.append(f"[{time.strftime('%H:%M:%S')}] {len(streamers)} streamer yüklendi")
+        streamer_meta.update(streamers)
+        streamer_view.replace(streamer_meta)
+        add_log(f"{len(streamers)} streamer yüklendi", event="streamers")
+        
+        # Önceki çalışmadan kalan durum: token, online listesi ve açık yayınlar
+        snapshot = load_state_snapshot(STATE_PATH)
+        resume = apply_state_snapshot(snapshot) if snapshot else []
+        if snapshot and snapshot.get("watching"):
+            # Oturumlar deftere geçti; defter diske yazmadan önce çökersek tekrar sayılmasınlar
+            await save_state_snapshot({}, resume)
+        state_loaded = True
+        
+        await token_manager.get()
+        token_manager.start()
+        if resume:
+            add_log(f"{len(resume)} yayın snapshot'tan geri açılıyor", event="restore")
+            spawn(restore_sessions(resume))
+        spawn(watch_streamers_file(STREAMERS_FILE))
+        spawn(snapshot_loop())
+        if eventsub.enabled:
+            spawn(eventsub.start(list(streamer_meta)))
     except Exception as e:
         console.print(f"[bold red]❌ Başlangıç hatası: {e}[/]")
         logger.error(f"Başlangıç hatası: {e}")
         return
     
-    layout = make_layout()
+    live = None
+    if daemon_mode:
+        console.print("[cyan]Daemon modu: arayüz çizilmiyor, durum /status ve /status.json üzerinden[/]")
+    else:
+        from rich.live import Live
+        layout = make_layout()
+        live = Live(layout, auto_refresh=False, screen=True)
+        live.start()
     
-    with Live(layout, refresh_per_second=2, screen=True):
-        check_counter = 0
+    try:
         while True:
             try:
-                if check_counter % 60 == 0:
-                    try:
-                        online = get_online_streamers(streamers, token)
-                        logs.append(f"[{time.strftime('%H:%M:%S')}] API kontrolü: {len(online)} online streamer")
-                        
-                        new_streamers = [u for u in online if u not in pages]
-                        if new_streamers:
-                            logs.append(f"[{time.strftime('%H:%M:%S')}] {len(new_streamers)} streamer açılıyor...")
-                            tasks = [start_watching(user) for user in new_streamers]
-                            try:
-                                results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=30.0)
-                                successful = sum(1 for r in results if r is True)
-                                logs.append(f"[{time.strftime('%H:%M:%S')}] {successful}/{len(new_streamers)} streamer açıldı")
-                            except asyncio.TimeoutError:
-                                logs.append(f"[{time.strftime('%H:%M:%S')}] Açılma timeout (30s)")
-                        
-                        offline_streamers = [u for u in list(pages.keys()) if u not in online]
-                        if offline_streamers:
-                            close_tasks = [stop_watching(user) for user in offline_streamers]
-                            await asyncio.gather(*close_tasks, return_exceptions=True)
-                                
-                    except Exception as e:
-                        logs.append(f"[{time.strftime('%H:%M:%S')}] API hatası: {str(e)}")
-                        logger.error(f"API hatası: {e}")
-                        try:
-                            token = get_app_token()
-                            logs.append(f"[{time.strftime('%H:%M:%S')}] Token yenilendi")
-                        except Exception as token_error:
-                            logs.append(f"[{time.strftime('%H:%M:%S')}] Token yenilenme hatası: {str(token_error)}")
-                            logger.error(f"Token yenilenme hatası: {token_error}")
-                            
-                else:
-                    try:
-                        online = get_online_streamers(list(pages.keys()), token) if pages else {}
-                    except:
-                        online = {}
+                await poll_once()
                 
-                left, middle, right = render_panels(online, streamers)
-                layout["left"].update(left)
-                layout["middle"].update(middle)
-                layout["right"].update(right)
+                if live is not None:
+                    (left, middle, right), changed = dashboard.render(current_online, streamer_view)
+                    if changed:
+                        layout["left"].update(left)
+                        layout["middle"].update(middle)
+                        layout["right"].update(right)
+                        live.refresh()
                 
-                check_counter += 1
                 await asyncio.sleep(1)
                 
             except Exception as e:
                 logger.error(f"Ana döngü hatası: {e}")
-                logs.append(f"[{time.strftime('%H:%M:%S')}] Ana döngü hatası: {str(e)}")
+                add_log(f"Ana döngü hatası: {str(e)}", level="error", event="monitor")
                 await asyncio.sleep(5)
+    finally:
+        if live is not None:
+            live.stop()
+
+def browser_processes() -> list:
+    # Chromium ve Playwright sürücüsü; worker süreçleri (python) kendi ağaçlarını kapatır
+    result = []
+    for child in script_process.children(recursive=True):
+        try:
+            if "python" not in child.name().lower():
+                result.append(child)
+        except psutil.NoSuchProcess:
+            pass
+    return result
+
+def process_tree(pid: int) -> list:
+    try:
+        return psutil.Process(pid).children(recursive=True)
+    except psutil.NoSuchProcess:
+        return []
+
+def kill_processes(processes: list) -> int:
+    killed = []
+    for process in processes:
+        try:
+            process.kill()
+            killed.append(process)
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(killed, timeout=3)
+    return len(killed)
+
+async def within_deadline(coro, deadline: float, what: str) -> bool:
+    try:
+        await asyncio.wait_for(coro, timeout=max(deadline - time.monotonic(), 0.1))
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Kapanış: {what} süre sınırında bitmedi")
+    except Exception as e:
+        logger.warning(f"Kapanış: {what} hatası: {e}")
+    return False
+
+async def close_pages(deadline: float) -> list:
+    # Sayfalar birlikte kapatılır; kapanış sayfa sayısıyla değil en yavaş sayfayla uzar
+    watching = list(pages.keys())
+    stopped_at = time.time()
+    if shard_supervisor is not None:
+        # Worker'lar sayfalarını shutdown komutuyla kendileri kapatır; tek tek stop gönderilmez
+        shard_supervisor.forget_all()
+        return watching
+    await within_deadline(
+        asyncio.gather(*(close_stream(user, discard=True) for user in watching), return_exceptions=True),
+        deadline,
+        f"{len(watching)} sayfanın kapatılması",
+    )
+    # Süre dolunca yarıda kalan oturumlar da deftere yazılır
+    for user in watching:
+        if user in watch_times:
+            watch_ledger.record(user, watch_times.pop(user), stopped_at)
+    return watching
 
-async def cleanup():
-    logger.info("Temizlik işlemleri başlatılıyor...")
+async def close_browser(deadline: float) -> bool:
+    # Süreçler önceden alınır; tarayıcı zamanında kapanmazsa Chromium ve sürücü öldürülür
+    processes = await asyncio.to_thread(browser_processes)
     
-    for user in list(pages.keys()):
-        await stop_watching(user)
+    async def close_all():
+        await context_pool.close()
+        await asyncio.gather(*(context.close() for context in shared_contexts), return_exceptions=True)
+        shared_contexts.clear()
+        if browser:
+            await browser.close()
+        if playwright:
+            await playwright.stop()
+    
+    if await within_deadline(close_all(), deadline, "tarayıcının kapatılması"):
+        return False
+    killed = await asyncio.to_thread(kill_processes, processes)
+    logger.warning(f"Kapanış: {killed} tarayıcı süreci öldürüldü")
+    return True
+
+async def cleanup(timeout: float = SHUTDOWN_TIMEOUT) -> float:
+    started = time.monotonic()
+    deadline = started + timeout
+    logger.info(f"Temizlik işlemleri başlatılıyor ({len(pages)} sayfa, süre sınırı {timeout:.0f}sn)...")
+    
+    await page_watchdog.stop()
+    await page_throttler.stop()
+    await stream_launcher.stop()
+    await loop_lag_monitor.stop()
+    loop_diagnostics.stop()
+    
+    # Temiz kapanışta oturumlar deftere yazılır; snapshot sadece hangi yayınların geri açılacağını taşır
+    watching = await close_pages(deadline)
+    if state_loaded:
+        await save_state_snapshot({}, watching)
+    # Defter ve snapshot yerel diskte; tarayıcı kapanışı takılsa bile yazılmış olurlar
+    await watch_ledger.close()
+    
+    if shard_supervisor is not None:
+        await shard_supervisor.stop(max(deadline - time.monotonic(), 1))
+    forced = await close_browser(deadline)
     
-    if browser:
-        await browser.close()
+    await token_manager.stop()
+    await close_http_session()
     
-    if playwright:
-        await playwright.stop()
+    elapsed = time.monotonic() - started
+    add_log(f"Tüm yayınlar kapatıldı ({elapsed:.1f}sn)", event="shutdown")
+    logger.info(f"Tüm yayınlar kapatıldı - {len(watching)} sayfa, {elapsed:.1f}sn" + (" (tarayıcı öldürüldü)" if forced else ""))
+    for handler in logger.handlers:
+        handler.flush()
+    return elapsed
+
+def install_signal_handlers(stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    
+    def on_signal(sig: signal.Signals):
+        if stop.is_set():
+            # İkinci sinyal: kapanış beklenmez, alt süreçler yetim kalmasın diye öldürülür
+            logger.warning(f"{sig.name} tekrar alındı, alt süreçler öldürülüp çıkılıyor")
+            kill_processes(script_process.children(recursive=True))
+            logging.shutdown()
+            os._exit(1)
+        logger.info(f"{sig.name} alındı, kapanış başlatılıyor")
+        stop.set()
     
-    logs.append(f"[{time.strftime('%H:%M:%S')}] Tüm yayınlar kapatıldı")
-    logger.info("Tüm yayınlar kapatıldı")
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, on_signal, sig)
+        except NotImplementedError:
+            # Windows'ta Ctrl+C KeyboardInterrupt olarak gelmeye devam eder
+            pass
 
 async def main():
+    stop = asyncio.Event()
     try:
         logger.info("Twitch Monitor başlatılıyor...")
+        install_signal_handlers(stop)
+        if DIAGNOSTICS:
+            loop_diagnostics.start()
         
         server_task = asyncio.create_task(start_keep_alive_server())
         monitor_task = asyncio.create_task(monitor_streams())
+        stop_task = asyncio.create_task(stop.wait())
         
-        await asyncio.gather(server_task, monitor_task)
+        await server_task
+        await asyncio.wait({monitor_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        stop_task.cancel()
+        if monitor_task.done():
+            monitor_task.result()
+        else:
+            # Önce arayüz kapanır ki terminal normale dönsün
+            monitor_task.cancel()
+            await asyncio.gather(monitor_task, return_exceptions=True)
+            console.print("\n[bold red]Program sonlandırılıyor...[/]")
+        await cleanup()
+        console.print("[bold green]Program temiz bir şekilde sonlandırıldı.[/]")
+        logger.info("Program temiz bir şekilde sonlandırıldı")
         
     except KeyboardInterrupt:
         console.print("\n[bold red]Program sonlandırılıyor...[/]")